@@ -0,0 +1,68 @@
+"""Measure PDF layout time against file length.
+
+Lays out one synthetic source file per size with PDFProcessor and reports
+the time per line, which should stay flat as files grow. The exit status
+is 1 when the time per line of the longest file exceeds that of the
+shortest by more than the allowed factor.
+
+Usage:
+    python -m benchmarks.pdf_layout [--lines 1000,5000,20000] [--max-ratio 2.0] [--line-numbers]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from typing import List
+
+from src.processors.pdf_processor import PDFProcessor
+
+def _source(lines: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = ("value", "result", "config", "item", "index", "count", "name", "data")
+    return "\n".join(
+        f"{'    ' * rng.randint(0, 3)}{rng.choice(words)}_{i} = {rng.choice(words)}({rng.randint(0, 999)})"
+        for i in range(lines)
+    ) + "\n"
+
+def layout_seconds(lines: int, out_dir: str, line_numbers: bool, repeat: int) -> float:
+    """Best time to lay out and write a PDF holding one file of `lines` lines."""
+    content = _source(lines)
+    best = float("inf")
+    for _ in range(repeat):
+        processor = PDFProcessor(out_dir, os.path.join(out_dir, "layout.pdf"), line_numbers=line_numbers)
+        start = time.perf_counter()
+        processor.begin()
+        processor.add_front_matter("repo/\n+-- big.py")
+        processor.add_file("big.py", content)
+        processor.finish()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", default="1000,2000,5000,10000,20000", help="Comma-separated file lengths")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per length; the fastest is kept")
+    parser.add_argument("--line-numbers", action="store_true", help="Lay out with the line-number gutter")
+    parser.add_argument("--max-ratio", type=float, default=None,
+                        help="Fail if time per line grows by more than this factor from shortest to longest")
+    args = parser.parse_args()
+
+    sizes: List[int] = sorted(int(n) for n in args.lines.split(","))
+    per_line = []
+    with tempfile.TemporaryDirectory(prefix="repo_copyer_layout_") as out_dir:
+        print(f"{'lines':>8} {'seconds':>9} {'us/line':>9}")
+        for lines in sizes:
+            seconds = layout_seconds(lines, out_dir, args.line_numbers, max(1, args.repeat))
+            per_line.append(seconds / lines * 1e6)
+            print(f"{lines:>8} {seconds:>9.3f} {per_line[-1]:>9.1f}")
+
+    ratio = per_line[-1] / per_line[0]
+    print(f"\nTime per line, longest vs shortest: {ratio:.2f}x")
+    if args.max_ratio is not None and ratio > args.max_ratio:
+        print(f"FAIL: layout is not linear (limit {args.max_ratio:.2f}x)")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Time each pipeline stage on a synthetic repository.
+
+Stages are run one after another so each is measured on its own: scan
+(get_files_to_process and get_file_tree), read, format, TXT write and PDF
+build. Results are written as JSON and can be compared against a stored
+baseline; the exit status is 1 when a stage regressed by more than the
+threshold.
+
+Usage:
+    python -m benchmarks.stages --files 2000 --output results.json
+    python -m benchmarks.stages --files 2000 --baseline baseline.json [--threshold 0.10]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+from dataclasses import asdict
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.synthetic_repo import add_spec_arguments, generate_repo, spec_from_args
+from src.config import settings
+from src.config.settings import MAX_FILE_SIZE
+from src.formatters.code_formatter import configure_format_cache, format_code, shutdown_formatters
+from src.processors.ingest import read_file_bytes, clean_text
+from src.processors.pdf_processor import PDFProcessor
+from src.processors.txt_processor import TXTProcessor
+from src.utils.async_utils import ordered_prefetch
+from src.utils.encoding import decode_text
+from src.utils.file_utils import get_file_tree, get_files_to_process
+
+STAGES = ("scan_files", "scan_tree", "read", "format", "txt_write", "pdf_build")
+
+async def _read(file_path: str) -> Optional[Tuple[str, int]]:
+    if os.path.getsize(file_path) > MAX_FILE_SIZE:
+        return None
+    encoding, data = await read_file_bytes(file_path)
+    if encoding is None:
+        return None
+    return decode_text(data, encoding), len(data)
+
+async def run_stages(repo_path: str, out_dir: str) -> Tuple[Dict[str, float], Dict[str, int]]:
+    """Run every stage once.
+
+    Args:
+        repo_path: Repository to process
+        out_dir: Directory for the TXT and PDF outputs
+
+    Returns:
+        (seconds per stage, bytes processed per stage)
+    """
+    seconds: Dict[str, float] = {}
+    volume: Dict[str, int] = {}
+
+    start = time.perf_counter()
+    files = await get_files_to_process(repo_path)
+    seconds["scan_files"] = time.perf_counter() - start
+    start = time.perf_counter()
+    tree = await get_file_tree(repo_path)
+    seconds["scan_tree"] = time.perf_counter() - start
+    volume["scan_files"] = volume["scan_tree"] = 0
+
+    start = time.perf_counter()
+    texts: List[Tuple[str, str]] = []
+    read_bytes = 0
+    async for file_path, result in ordered_prefetch(
+        files, lambda path: _wrap(path, _read(path)), settings.MAX_CONCURRENT_TASKS
+    ):
+        if result is not None:
+            texts.append((file_path, clean_text(result[0])))
+            read_bytes += result[1]
+    seconds["read"] = time.perf_counter() - start
+    volume["read"] = read_bytes
+
+    # Measure the formatters themselves, not the caches in front of them
+    configure_format_cache(None)
+    format_code.cache_clear()
+    start = time.perf_counter()
+    formatted: List[Tuple[str, str]] = []
+    async for file_path, content in ordered_prefetch(
+        texts, lambda item: _wrap(item[0], format_code(item[1], os.path.splitext(item[0])[1].lower())),
+        settings.MAX_CONCURRENT_TASKS,
+    ):
+        formatted.append((os.path.relpath(file_path, repo_path), content))
+    seconds["format"] = time.perf_counter() - start
+    volume["format"] = volume["txt_write"] = volume["pdf_build"] = sum(
+        len(content.encode("utf-8")) for _, content in formatted
+    )
+
+    for stage, sink in (
+        ("txt_write", TXTProcessor(repo_path, os.path.join(out_dir, "bench.txt"))),
+        ("pdf_build", PDFProcessor(repo_path, os.path.join(out_dir, "bench.pdf"))),
+    ):
+        start = time.perf_counter()
+        await sink.open(tree)
+        for rel_path, content in formatted:
+            await sink.write_file(rel_path, content)
+        await sink.close()
+        seconds[stage] = time.perf_counter() - start
+
+    return seconds, volume
+
+async def _wrap(key, awaitable):
+    return key, await awaitable
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Compare stage timings against a baseline.
+
+    Args:
+        results: Results of this run
+        baseline: Results of the baseline run
+        threshold: Allowed slowdown as a fraction, e.g. 0.10 for 10%
+
+    Returns:
+        Stages that regressed beyond the threshold
+    """
+    regressions = []
+    print(f"\n{'stage':<12} {'baseline':>10} {'current':>10} {'change':>8}")
+    for stage in STAGES:
+        before = baseline.get("stages", {}).get(stage, {}).get("seconds")
+        after = results["stages"][stage]["seconds"]
+        if not before:
+            print(f"{stage:<12} {'-':>10} {after:>9.3f}s {'new':>8}")
+            continue
+        change = after / before - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(stage)
+            flag = "  REGRESSION"
+        print(f"{stage:<12} {before:>9.3f}s {after:>9.3f}s {change:>+7.1%}{flag}")
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_spec_arguments(parser)
+    parser.add_argument("--repo", default=None, help="Benchmark an existing repository instead of a synthetic one")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the fastest is kept")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    parser.add_argument("--baseline", default=None, help="Compare against results JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown per stage (default: 10%%)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="repo_copyer_bench_")
+    try:
+        spec = spec_from_args(args)
+        repo_path = args.repo
+        summary = None
+        if repo_path is None:
+            repo_path = os.path.join(work_dir, "repo")
+            summary = generate_repo(repo_path, spec)
+
+        best: Dict[str, float] = {}
+        volume: Dict[str, int] = {}
+
+        async def run_all() -> None:
+            try:
+                for _ in range(max(1, args.repeat)):
+                    seconds, volume_run = await run_stages(repo_path, work_dir)
+                    volume.update(volume_run)
+                    for stage, elapsed in seconds.items():
+                        best[stage] = min(best.get(stage, elapsed), elapsed)
+            finally:
+                await shutdown_formatters()
+
+        asyncio.run(run_all())
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {
+        "repo": args.repo,
+        "spec": None if args.repo else asdict(spec),
+        "synthetic": summary,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "stages": {
+            stage: {
+                "seconds": round(best[stage], 6),
+                "mb_per_s": round(volume[stage] / (1024 * 1024) / best[stage], 3) if volume[stage] else None,
+            }
+            for stage in STAGES
+        },
+        "total_seconds": round(sum(best.values()), 6),
+    }
+
+    for stage in STAGES:
+        rate = results["stages"][stage]["mb_per_s"]
+        print(f"{stage:<12} {best[stage]:>9.3f}s" + (f" {rate:>10.1f} MB/s" if rate else ""))
+    print(f"{'total':<12} {results['total_seconds']:>9.3f}s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measure command line startup time.
+
+Times ``import src.main`` and a TXT-only conversion of a tiny repository,
+each in a fresh interpreter, and checks that the TXT-only run does not load
+libraries only needed for PDF output or Python formatting. The exit status
+is 1 when a median exceeds its limit or a heavy library was loaded.
+
+Usage:
+    python -m benchmarks.startup [--runs 10] [--max-import-ms 150] [--max-run-ms 500]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import statistics
+import subprocess
+import tempfile
+from typing import List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules a TXT-only run of a repository without Python files must not import
+HEAVY_MODULES = ("reportlab", "black", "autopep8", "psutil", "sqlite3")
+
+# Runs the converter and reports which heavy modules ended up loaded
+_RUN_SCRIPT = """
+import sys, json, asyncio
+from src.main import main
+asyncio.run(main(sys.argv[1:]))
+print(json.dumps([m for m in {heavy!r} if m in sys.modules]))
+"""
+
+def _time_runs(command: List[str], runs: int) -> List[float]:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def _tiny_repo(root: str) -> None:
+    os.makedirs(os.path.join(root, "docs"))
+    with open(os.path.join(root, "README.md"), "w", encoding="utf-8") as f:
+        f.write("# Tiny\n\nA repository with a handful of files.\n")
+    with open(os.path.join(root, "docs", "notes.txt"), "w", encoding="utf-8") as f:
+        f.write("Startup benchmark fixture.\n" * 20)
+    with open(os.path.join(root, "config.json"), "w", encoding="utf-8") as f:
+        f.write('{"name": "tiny"}\n')
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Interpreter launches per measurement")
+    parser.add_argument("--max-import-ms", type=float, default=150.0, help="Fail if importing src.main takes longer; 0 disables the check")
+    parser.add_argument("--max-run-ms", type=float, default=500.0, help="Fail if the TXT-only run takes longer; 0 disables the check")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="repo_copyer_startup_")
+    try:
+        repo = os.path.join(work_dir, "tiny")
+        _tiny_repo(repo)
+        convert_args = [repo, "--format", "txt", "--no-cache", "--output-dir", os.path.join(work_dir, "out")]
+
+        baseline = statistics.median(_time_runs([sys.executable, "-c", "pass"], args.runs))
+        import_ms = statistics.median(_time_runs([sys.executable, "-c", "import src.main"], args.runs))
+        run_ms = statistics.median(_time_runs([sys.executable, "-m", "src.main", *convert_args], args.runs))
+
+        result = subprocess.run(
+            [sys.executable, "-c", _RUN_SCRIPT.format(heavy=HEAVY_MODULES), *convert_args],
+            cwd=ROOT, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{'interpreter':<14} {baseline:>8.1f}ms")
+    print(f"{'import':<14} {import_ms:>8.1f}ms  (+{import_ms - baseline:.1f}ms)")
+    print(f"{'txt run':<14} {run_ms:>8.1f}ms  (+{run_ms - baseline:.1f}ms)")
+
+    failures = []
+    if loaded:
+        failures.append(f"TXT-only run imported {', '.join(loaded)}")
+    if args.max_import_ms and import_ms > args.max_import_ms:
+        failures.append(f"import took {import_ms:.1f}ms, limit {args.max_import_ms:.1f}ms")
+    if args.max_run_ms and run_ms > args.max_run_ms:
+        failures.append(f"TXT-only run took {run_ms:.1f}ms, limit {args.max_run_ms:.1f}ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Generate a deterministic synthetic repository for benchmarking.
+
+The same arguments and seed always produce the same tree and contents.
+
+Usage:
+    python -m benchmarks.synthetic_repo /tmp/synthetic --files 2000 [--seed 0]
+"""
+import os
+import math
+import random
+import argparse
+import shutil
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# Default language mix: extension -> share of text files
+LANGUAGE_MIX: Dict[str, float] = {
+    ".py": 0.35, ".js": 0.15, ".ts": 0.10, ".go": 0.10, ".java": 0.10, ".md": 0.10, ".json": 0.10,
+}
+BINARY_EXTENSIONS = (".png", ".jpg", ".woff2", ".bin")
+EXCLUDED_DIRS = ("node_modules", "build", "dist", "__pycache__", "venv")
+SEGMENTS = ("src", "handlers", "app", "core", "utils", "api", "models", "views", "services", "components")
+WORDS = ("value", "result", "config", "item", "index", "count", "name", "data", "node", "cache", "user", "path")
+
+@dataclass
+class RepoSpec:
+    """Shape of a synthetic repository."""
+    files: int = 2000  # Text and binary files outside excluded directories
+    median_size: int = 4 * 1024  # Median file size in bytes (log-normal)
+    size_sigma: float = 1.0  # Spread of the log-normal size distribution
+    max_size: int = 2 * 1024 * 1024  # Sizes are capped here
+    max_depth: int = 5  # Deepest directory nesting
+    binary_ratio: float = 0.05  # Share of files that are binary
+    excluded_files: int = 1000  # Files placed under excluded directories
+    languages: Dict[str, float] = field(default_factory=lambda: dict(LANGUAGE_MIX))
+    seed: int = 0
+
+def _sizes(spec: RepoSpec, rng: random.Random, count: int) -> List[int]:
+    mu = math.log(spec.median_size)
+    return [min(spec.max_size, max(16, int(rng.lognormvariate(mu, spec.size_sigma)))) for _ in range(count)]
+
+def _line(ext: str, rng: random.Random, indent: int) -> str:
+    a, b, c = rng.choice(WORDS), rng.choice(WORDS), rng.choice(WORDS)
+    pad = "    " * indent
+    if ext == ".py":
+        return rng.choice([
+            f"{pad}{a}_{b} = {c}({a}, {rng.randint(0, 999)})",
+            f"{pad}def {a}_{b}({c}):",
+            f"{pad}if {a} is not None and {b}:",
+            f"{pad}return {{'{a}': {b}, '{c}': [{rng.randint(0, 9)}, {rng.randint(0, 9)}]}}",
+            f"{pad}# {a} {b} {c}",
+        ])
+    if ext in (".js", ".ts"):
+        return rng.choice([
+            f"{pad}const {a}{b.title()} = {c}({a}, {rng.randint(0, 999)});",
+            f"{pad}function {a}{b.title()}({c}) {{ return {c} + {rng.randint(0, 9)} }}",
+            f"{pad}if ({a} && {b}) {{ {c}.push({a}) }}",
+            f"{pad}// {a} {b} {c}",
+        ])
+    if ext == ".md":
+        return rng.choice([f"## {a.title()} {b}", f"- {a} {b} {c}", f"The {a} of the {b} is {c}.", ""])
+    if ext == ".json":
+        return f'{pad}"{a}_{b}": "{c}",'
+    return rng.choice([
+        f"{pad}{a}{b.title()} := {c}({rng.randint(0, 999)})",
+        f"{pad}int {a}{b.title()} = {c}.get({rng.randint(0, 999)});",
+        f"{pad}// {a} {b} {c}",
+    ])
+
+def _text(ext: str, size: int, rng: random.Random) -> bytes:
+    lines = []
+    total = 0
+    while total < size:
+        line = _line(ext, rng, rng.randint(0, 3) if ext not in (".md",) else 0)
+        lines.append(line)
+        total += len(line) + 1
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+def _binary(ext: str, size: int, rng: random.Random) -> bytes:
+    headers = {".png": b"\x89PNG\r\n\x1a\n", ".jpg": b"\xff\xd8\xff\xe0", ".woff2": b"wOF2"}
+    return headers.get(ext, b"\x00\x01") + rng.getrandbits(size * 8).to_bytes(size, "little")
+
+def _directory(spec: RepoSpec, rng: random.Random) -> List[str]:
+    return [rng.choice(SEGMENTS) for _ in range(rng.randint(0, spec.max_depth))]
+
+def generate_repo(root: str, spec: RepoSpec) -> Dict[str, int]:
+    """Write a synthetic repository.
+
+    Args:
+        root: Directory to create; an existing one is replaced
+        spec: Shape of the repository
+
+    Returns:
+        Counts and total bytes of what was written
+    """
+    rng = random.Random(spec.seed)
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    os.makedirs(root)
+
+    extensions = list(spec.languages)
+    weights = [spec.languages[ext] for ext in extensions]
+    summary = {"text_files": 0, "binary_files": 0, "excluded_files": 0, "bytes": 0}
+
+    def write(parts: List[str], name: str, data: bytes) -> None:
+        directory = os.path.join(root, *parts)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(data)
+        summary["bytes"] += len(data)
+
+    for i, size in enumerate(_sizes(spec, rng, spec.files)):
+        parts = _directory(spec, rng)
+        if rng.random() < spec.binary_ratio:
+            ext = rng.choice(BINARY_EXTENSIONS)
+            write(parts, f"asset{i}{ext}", _binary(ext, size, rng))
+            summary["binary_files"] += 1
+        else:
+            ext = rng.choices(extensions, weights)[0]
+            write(parts, f"{rng.choice(WORDS)}_{i}{ext}", _text(ext, size, rng))
+            summary["text_files"] += 1
+
+    for i, size in enumerate(_sizes(spec, rng, spec.excluded_files)):
+        parts = _directory(spec, rng)
+        parts.insert(rng.randint(0, len(parts)), rng.choice(EXCLUDED_DIRS))
+        ext = rng.choices(extensions, weights)[0]
+        write(parts, f"vendored_{i}{ext}", _text(ext, min(size, 16 * 1024), rng))
+        summary["excluded_files"] += 1
+
+    return summary
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the RepoSpec options to a command line parser."""
+    defaults = RepoSpec()
+    parser.add_argument("--files", type=int, default=defaults.files, help="Files outside excluded directories")
+    parser.add_argument("--median-size", type=int, default=defaults.median_size, help="Median file size in bytes")
+    parser.add_argument("--size-sigma", type=float, default=defaults.size_sigma, help="Log-normal size spread")
+    parser.add_argument("--max-depth", type=int, default=defaults.max_depth, help="Deepest directory nesting")
+    parser.add_argument("--binary-ratio", type=float, default=defaults.binary_ratio, help="Share of binary files")
+    parser.add_argument("--excluded-files", type=int, default=defaults.excluded_files,
+                        help="Files under excluded directories such as node_modules/")
+    parser.add_argument("--languages", default=None,
+                        help="Language mix as ext=weight pairs, e.g. '.py=3,.js=1'")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Random seed")
+
+def spec_from_args(args: argparse.Namespace) -> RepoSpec:
+    """Build a RepoSpec from parsed RepoSpec options."""
+    spec = RepoSpec(
+        files=args.files, median_size=args.median_size, size_sigma=args.size_sigma, max_depth=args.max_depth,
+        binary_ratio=args.binary_ratio, excluded_files=args.excluded_files, seed=args.seed,
+    )
+    if args.languages:
+        spec.languages = {ext: float(weight) for ext, weight in (pair.split("=") for pair in args.languages.split(","))}
+    return spec
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="Directory to create")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+    summary = generate_repo(args.root, spec_from_args(args))
+    print(f"{summary['text_files']} text, {summary['binary_files']} binary, "
+          f"{summary['excluded_files']} excluded files, {summary['bytes'] / (1024 * 1024):.1f}MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark text normalization and line wrapping.
+
+Compares the replace-per-character cleanup and word-loop wrap_text used
+before with the TEXT_SUBSTITUTIONS table and the linear wrap_text, on
+inputs where the old code was slowest. Cleanup only gains on ASCII-only
+input; "source code", which holds block characters, runs at the old speed.
+
+Usage:
+    python -m benchmarks.text_engine [--size-mb 4] [--seed 0]
+"""
+import argparse
+import random
+import time
+from typing import Callable, Dict
+
+from src.config.settings import BLOCK_CHARS
+from src.processors.ingest import clean_text
+from src.utils.file_utils import wrap_text
+
+WRAP_WIDTH = 80
+
+def clean_text_before(content: str) -> str:
+    """Tab expansion and block character removal as 16 full-string replaces."""
+    content = content.replace('\t', '    ')
+    for ch in BLOCK_CHARS:
+        content = content.replace(ch, ' ')
+    return content
+
+def wrap_text_before(text: str, width: int) -> str:
+    """Word-loop wrap building each line with repeated +=."""
+    lines = text.split('\n')
+    wrapped_lines = []
+    for line in lines:
+        if len(line) <= width:
+            wrapped_lines.append(line)
+            continue
+        current_line = ''
+        for word in line.split(' '):
+            if len(current_line) + len(word) + 1 <= width:
+                if current_line:
+                    current_line += ' ' + word
+                else:
+                    current_line = word
+            else:
+                if current_line:
+                    wrapped_lines.append(current_line)
+                current_line = word
+        if current_line:
+            wrapped_lines.append(current_line)
+    return '\n'.join(wrapped_lines)
+
+def minified_js(size: int, rng: random.Random) -> str:
+    """One huge line of identifiers and punctuation; spaces only follow keywords."""
+    tokens = ["function", "return ", "var ", "new ", "typeof ", "a", "b", "c", "e", "t", "n", "=", "(", ")",
+              "{", "}", ";", ",", ".", "!0", "void 0", "null", "this", "+", "&&", "||", "?", ":"]
+    parts = []
+    total = 0
+    while total < size:
+        token = rng.choice(tokens)
+        parts.append(token)
+        total += len(token)
+    return "".join(parts)
+
+def long_lines(size: int, rng: random.Random) -> str:
+    """Prose-like lines of 200-2000 characters, e.g. generated data or docs."""
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit", "sed", "do"]
+    lines = []
+    total = 0
+    while total < size:
+        line = " ".join(rng.choice(words) for _ in range(rng.randint(30, 300)))
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+def source_code(size: int, rng: random.Random) -> str:
+    """Ordinary source code: short indented lines with tabs and box-drawing art."""
+    lines = []
+    total = 0
+    while total < size:
+        indent = "\t" * rng.randint(0, 4)
+        line = indent + rng.choice(["x = compute(a, b)", "return value", "# ██ section ██", "if ready:", ""])
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+def bench(label: str, func: Callable[[str], str], text: str, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    rate = len(text.encode("utf-8")) / (1024 * 1024) / best
+    print(f"  {label:<22} {rate:>10.1f} MB/s")
+    return rate
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=4.0, help="Size of each generated input")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    size = int(args.size_mb * 1024 * 1024)
+    inputs: Dict[str, str] = {
+        "minified JS": minified_js(size, rng),
+        "long lines": long_lines(size, rng),
+        "source code": source_code(size, rng),
+    }
+
+    for name, text in inputs.items():
+        assert wrap_text(text, WRAP_WIDTH) == wrap_text_before(text, WRAP_WIDTH)
+        assert clean_text(text) == clean_text_before(text)
+        print(f"{name} ({len(text) / (1024 * 1024):.1f}MB)")
+        before = bench("clean_text (before)", clean_text_before, text)
+        after = bench("clean_text", clean_text, text)
+        print(f"  {'':<22} {after / before:>10.1f}x")
+        before = bench("wrap_text (before)", lambda t: wrap_text_before(t, WRAP_WIDTH), text)
+        after = bench("wrap_text", lambda t: wrap_text(t, WRAP_WIDTH), text)
+        print(f"  {'':<22} {after / before:>10.1f}x\n")
+
+if __name__ == "__main__":
+    main()
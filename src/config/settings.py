@@ -1,18 +1,71 @@
 import os
-import psutil
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 
 # File processing settings
-BATCH_SIZE = 5000
-MAX_CONCURRENT_TASKS = min(200, (psutil.cpu_count() * 4))
+# MAX_CONCURRENT_TASKS and FORMAT_WORKERS depend on the machine and are
+# computed on first access; see _LAZY_SETTINGS below. Both read-ahead limits
+# are upper bounds that the resource governor lowers under memory pressure.
+PREFETCH_MAX_BYTES = 64 * 1024 * 1024  # Raw bytes of those files held at once
 CHUNK_SIZE = 1024 * 1024  # 1MB chunks for file reading
+SNIFF_SIZE = 8 * 1024  # Prefix read to tell text from binary and detect the encoding
+DEDUP_FILES = True  # Emit files identical to an earlier file as a reference to it
+DEDUP_MIN_SIZE = 64  # Smaller files are repeated, since a reference would not be shorter
+
+# Character substitutions applied to every file, one str.replace per key that occurs.
+# ASCII-only content skips the non-ASCII keys; other content is no faster than
+# replacing every key, as a single regex or str.translate pass is ~10x slower.
+BLOCK_CHARS = '■▄▌█▐▖▗▘▙▚▛▜▝▞▟'
+TEXT_SUBSTITUTIONS: Dict[str, str] = {'\t': '    ', **{ch: ' ' for ch in BLOCK_CHARS}}
 
 # File size limits
 MAX_FILE_SIZE = 1024 * 1024  # 1MB
 MAX_FORMAT_FILE_SIZE = 100 * 1024  # 100KB
+LARGE_FILE_MODE = "excerpt"  # Files over MAX_FILE_SIZE: "excerpt" keeps their head and tail, "skip" writes a placeholder
+EXCERPT_HEAD_LINES = 200  # Lines kept from the start of an oversized file
+EXCERPT_TAIL_LINES = 50  # Lines kept from the end of an oversized file; 0 keeps only the head
+EXCERPT_MAX_BYTES = 64 * 1024  # Cap on each of the head and tail, for files with very long lines
+EXCERPT_COUNT_LIMIT = 4 * 1024 * 1024  # Largest elided middle whose lines are counted; longer ones are estimated
+
+# Formatter settings
+FORMAT_TIMEOUT = 30.0  # Seconds allowed per file before falling back to raw content
+PRETTIER_WORKERS = 2  # Persistent Node processes running prettier
+PRETTIER_BATCH_SIZE = 32  # Files sent to a prettier worker per request
+PRETTIER_TIMEOUT = 60.0  # Seconds allowed per prettier request before restarting the worker
+PRETTIER_MAX_RESTARTS = 3  # Failed starts in a row before a worker is retired
+PRETTIER_WORKER_CMD: Optional[Tuple[str, ...]] = None  # Override the worker command (e.g. a stand-in script)
 
 # Output settings
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "output")
+OUTPUT_BUFFER_SIZE = 4 * 1024 * 1024  # Bytes of TXT output collected before each write
+OUTPUT_WRITER_THREAD = True  # Write TXT output on a dedicated thread instead of the event loop
+TXT_INDEX = True  # Write a <name>.index.json sidecar with the byte range of every file in the TXT output
+TXT_SHARD_SIZE = 0  # Split the TXT output into shards of at most this many bytes; 0 writes a single file
+
+# In-memory formatting cache
+FORMAT_MEMORY_CACHE_SIZE = 256  # Entries
+FORMAT_MEMORY_CACHE_BYTES = 64 * 1024 * 1024  # 64MB of formatted content
+
+# PDF settings
+PDF_STREAMING = True  # Lay out pages as files arrive instead of building one story at the end
+PDF_SHARDS = 1  # Processes rendering the PDF in parallel; 1 renders in-process
+PDF_LINE_NUMBERS = False  # Print source line numbers in a gutter left of each file's code
+
+# Persistent formatting cache
+FORMAT_CACHE_FILE = os.path.join(".cache", "format_cache.sqlite3")  # Under the output directory unless --cache-path is given
+FORMAT_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 512MB of formatted content
+
+# Resource governor
+MEMORY_CEILING = None  # Bytes of resident memory to stay under; None derives it from the memory limit
+MEMORY_CEILING_FRACTION = 0.5  # Share of the host or container (cgroup) memory limit used when MEMORY_CEILING is None
+GOVERNOR_INTERVAL = 0.2  # Seconds between memory samples
+
+# Conversion server
+SERVER_PORT = 8765
+SERVER_MAX_JOBS = 2  # Jobs converted at the same time; formatter pools are shared
+SERVER_HISTORY = 1000  # Finished jobs kept for status queries
+
+# Honour the repository's own .gitignore/.ignore files when collecting files
+RESPECT_GITIGNORE = True
 
 # Exclude patterns
 EXCLUDE_PATTERNS: Tuple[str, ...] = (
@@ -42,12 +95,19 @@ EXCLUDE_PATTERNS: Tuple[str, ...] = (
     "*.hmap", "*.ipa", "*.dSYM.zip", "*.dSYM",
 )
 
-def get_optimal_batch_size() -> int:
-    """Calculate optimal batch size based on system memory."""
-    memory = psutil.virtual_memory()
-    available_memory = memory.available * 0.5  # Use 50% of available memory
-    avg_file_size = 10 * 1024  # Assume average file size of 10KB
-    return min(10000, int(available_memory / avg_file_size))
+def _cpu_count() -> int:
+    return os.cpu_count() or 1
+
+# Settings probed from the system on first access instead of at import, so
+# commands that never use them do not pay for probing the system
+_LAZY_SETTINGS = {
+    "MAX_CONCURRENT_TASKS": lambda: min(200, _cpu_count() * 4),  # Files read and formatted ahead of the writer
+    "FORMAT_WORKERS": _cpu_count,  # Processes used for black/autopep8
+}
 
-# Update batch size based on system resources
-BATCH_SIZE = get_optimal_batch_size()
+def __getattr__(name: str):
+    if name in _LAZY_SETTINGS:
+        value = _LAZY_SETTINGS[name]()
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,20 +1,33 @@
-import os
-import asyncio
-import aiofiles
-import black
-import autopep8
-from typing import Optional
-from src.config.settings import MAX_FORMAT_FILE_SIZE
+from typing import TYPE_CHECKING, Optional, Tuple
+from src.config.settings import MAX_FORMAT_FILE_SIZE, FORMAT_MEMORY_CACHE_SIZE, FORMAT_MEMORY_CACHE_BYTES
+from src.formatters import python_pool
+from src.formatters.prettier_pool import PrettierPool
 from src.utils.async_utils import async_lru_cache
+from src.utils.metrics import record_formatter
 
-@async_lru_cache(maxsize=256)
+if TYPE_CHECKING:
+    from src.formatters.format_cache import FormatCache
+
+PYTHON_EXTENSIONS = ('.py',)
+WEB_EXTENSIONS = ('.js', '.jsx', '.ts', '.tsx', '.html', '.css', '.scss')
+
+# Formatters whose output may be stored in the persistent cache; "raw" and
+# "timeout" results depend on the environment and are recomputed next run.
+CACHEABLE_FORMATTERS = ('black', 'autopep8', 'prettier')
+
+_prettier_pool = PrettierPool()
+_disk_cache: Optional["FormatCache"] = None
+_python_formatter_id: Optional[str] = None
+
+@async_lru_cache(maxsize=FORMAT_MEMORY_CACHE_SIZE, maxbytes=FORMAT_MEMORY_CACHE_BYTES,
+                 on_hit=lambda: record_formatter("memory-cache"))
 async def format_code(content: str, file_extension: str) -> str:
     """Format code content based on file extension.
-    
+
     Args:
         content: The code content to format
         file_extension: File extension to determine formatter
-        
+
     Returns:
         Formatted code content
     """
@@ -22,63 +35,122 @@ async def format_code(content: str, file_extension: str) -> str:
         return content
 
     try:
-        if file_extension in ['.py']:
-            return await _format_python(content)
-        elif file_extension in ['.js', '.jsx', '.ts', '.tsx', '.html', '.css', '.scss']:
-            return await _format_web(content, file_extension)
+        if file_extension in PYTHON_EXTENSIONS:
+            return await _format_cached(content, file_extension, _python_id(), _format_python)
+        elif file_extension in WEB_EXTENSIONS:
+            # Skip formatting for large files
+            if len(content) > MAX_FORMAT_FILE_SIZE:
+                record_formatter("skipped")
+                return content
+            if not await _prettier_pool.ensure_started():
+                record_formatter("raw")
+                return content
+            return await _format_cached(content, file_extension, f"prettier-{_prettier_pool.version}", _format_web)
         return content
     except Exception:
+        record_formatter("error")
         return content
 
-async def _format_python(content: str) -> str:
-    """Format Python code using black or autopep8.
-    
+async def _format_cached(content: str, file_extension: str, formatter_id: str, formatter) -> str:
+    """Run a formatter through the persistent cache.
+
+    Args:
+        content: The code content to format
+        file_extension: File extension to determine formatter
+        formatter_id: Formatter name and version, part of the cache key
+        formatter: Coroutine function returning (formatted, formatter used)
+
+    Returns:
+        Formatted code content
+    """
+    cache = _disk_cache
+    if cache is None:
+        formatted, used = await formatter(content, file_extension)
+        record_formatter(used)
+        return formatted
+
+    key = cache.make_key(content, file_extension, formatter_id)
+    cached = cache.get(key)
+    if cached is not None:
+        record_formatter("disk-cache")
+        return cached
+
+    formatted, used = await formatter(content, file_extension)
+    record_formatter(used)
+    if used in CACHEABLE_FORMATTERS:
+        cache.put(key, formatted)
+    return formatted
+
+async def _format_python(content: str, file_extension: str = '.py') -> Tuple[str, str]:
+    """Format Python code using black or autopep8 in the worker pool.
+
     Args:
         content: Python code to format
-        
+        file_extension: Unused, kept for a uniform formatter signature
+
     Returns:
-        Formatted Python code
+        Tuple of (formatted code, formatter used)
     """
-    try:
-        return black.format_str(content, mode=black.FileMode())
-    except:
-        try:
-            return autopep8.fix_code(content)
-        except:
-            return content
-
-async def _format_web(content: str, file_extension: str) -> Optional[str]:
-    """Format web code using prettier.
-    
+    return await python_pool.format_python(content)
+
+async def _format_web(content: str, file_extension: str) -> Tuple[str, str]:
+    """Format web code using the persistent prettier workers.
+
     Args:
         content: Web code to format
         file_extension: File extension for prettier
-        
+
     Returns:
-        Formatted web code
+        Tuple of (formatted code, formatter used)
     """
-    # Skip formatting for large files
-    if len(content) > MAX_FORMAT_FILE_SIZE:
-        return content
-        
+    return await _prettier_pool.format(content, file_extension)
+
+def _python_id() -> str:
+    """Name and version of the Python formatters, used in cache keys."""
+    global _python_formatter_id
+    if _python_formatter_id is None:
+        _python_formatter_id = f"black-{_version('black')}+autopep8-{_version('autopep8')}"
+    return _python_formatter_id
+
+def _version(package: str) -> str:
+    from importlib import metadata
     try:
-        async with aiofiles.tempfile.NamedTemporaryFile(suffix=file_extension, delete=False) as temp:
-            await temp.write(content.encode())
-            temp_path = temp.name
-        
-        # Use --no-config to avoid looking for config files
-        # Use --ignore-path to avoid checking .prettierignore
-        process = await asyncio.create_subprocess_shell(
-            f'npx prettier --no-config --ignore-path /dev/null --write {temp_path}',
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        await process.communicate()
-        
-        async with aiofiles.open(temp_path, 'r') as f:
-            formatted = await f.read()
-        
-        await aiofiles.os.remove(temp_path)
-        return formatted
-    except:
-        return content
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+def configure_format_cache(path: Optional[str]) -> None:
+    """Enable the persistent formatting cache, or disable it with None.
+
+    Args:
+        path: Location of the sqlite cache file
+    """
+    global _disk_cache
+    if _disk_cache is not None:
+        _disk_cache.close()
+    _disk_cache = None
+    if path:
+        from src.formatters.format_cache import FormatCache
+        _disk_cache = FormatCache(path)
+
+def memory_cache_stats() -> Tuple[int, int]:
+    """Return (hits, misses) of the in-process formatting cache."""
+    info = format_code.cache_info()
+    return info.hits, info.misses
+
+def format_cache_stats() -> Optional[Tuple[int, int, float]]:
+    """Return (hits, misses, hit_rate) for the persistent cache, if enabled."""
+    if _disk_cache is None:
+        return None
+    return _disk_cache.hits, _disk_cache.misses, _disk_cache.hit_rate
+
+async def start_formatters() -> None:
+    """Start the formatter worker processes ahead of the first file."""
+    await python_pool.start()
+    await _prettier_pool.ensure_started()
+
+async def shutdown_formatters() -> None:
+    """Stop any formatter worker processes started during the run."""
+    python_pool.shutdown()
+    await _prettier_pool.close()
+    configure_format_cache(None)
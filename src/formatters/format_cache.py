@@ -0,0 +1,119 @@
+import os
+import time
+import sqlite3
+import hashlib
+from typing import Optional
+
+from src.config.settings import FORMAT_CACHE_MAX_BYTES
+
+COMMIT_INTERVAL = 500  # Writes between commits
+
+class FormatCache:
+    """Persistent formatting cache stored in a sqlite file.
+
+    Entries are keyed by a hash of the content, the file extension and the
+    formatter name/version, so upgrading black or prettier invalidates old
+    results automatically. When the stored values exceed ``max_bytes`` the
+    least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int = FORMAT_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._pending_writes = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    @staticmethod
+    def make_key(content: str, file_extension: str, formatter_id: str) -> str:
+        """Build the cache key for a piece of content.
+
+        Args:
+            content: Unformatted content
+            file_extension: File extension used to pick the formatter
+            formatter_id: Formatter name and version
+
+        Returns:
+            Hex digest identifying the formatted result
+        """
+        digest = hashlib.sha256(content.encode('utf-8', 'surrogatepass'))
+        digest.update(f"\0{file_extension}\0{formatter_id}".encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a formatted result.
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            The cached formatted content, or None on a miss
+        """
+        row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        self._note_write()
+        return row[0]
+
+    def put(self, key: str, formatted: str) -> None:
+        """Store a formatted result.
+
+        Args:
+            key: Key from make_key
+            formatted: Formatted content
+        """
+        size = len(formatted.encode('utf-8', 'surrogatepass'))
+        if size > self.max_bytes:
+            return
+        previous = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+            (key, formatted, size, time.time()),
+        )
+        self._total_bytes += size - (previous[0] if previous else 0)
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+        self._note_write()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache is at 90% of its limit."""
+        target = int(self.max_bytes * 0.9)
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed LIMIT 256"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in rows])
+            self._total_bytes -= sum(size for _, size in rows)
+
+    def _note_write(self) -> None:
+        self._pending_writes += 1
+        if self._pending_writes >= COMMIT_INTERVAL:
+            self._conn.commit()
+            self._pending_writes = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def close(self) -> None:
+        """Commit pending writes and close the database."""
+        self._conn.commit()
+        self._conn.close()
@@ -0,0 +1,233 @@
+import os
+import json
+import shutil
+import asyncio
+from typing import List, Optional, Sequence, Tuple
+
+from src.config.settings import (
+    PRETTIER_WORKERS, PRETTIER_TIMEOUT, PRETTIER_BATCH_SIZE,
+    PRETTIER_MAX_RESTARTS, PRETTIER_WORKER_CMD,
+)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "prettier_worker.js")
+STREAM_LIMIT = 64 * 1024 * 1024  # Largest single response line accepted from a worker
+
+class PrettierWorker:
+    """A single long-lived formatter process speaking JSON lines over stdin/stdout."""
+
+    def __init__(self, command: Sequence[str]):
+        self.command = list(command)
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.version: Optional[str] = None
+        self._next_id = 0
+
+    async def start(self) -> bool:
+        """Start the process and wait for its ready message.
+
+        Returns:
+            True if the worker is ready to format files
+        """
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=STREAM_LIMIT,
+        )
+        try:
+            line = await asyncio.wait_for(self.process.stdout.readline(), PRETTIER_TIMEOUT)
+            message = json.loads(line) if line else {}
+        except (asyncio.TimeoutError, ValueError):
+            message = {}
+        if not message.get("ready"):
+            await self.stop()
+            return False
+        self.version = message.get("version")
+        return True
+
+    async def format_files(self, files: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """Format several files in one request.
+
+        Args:
+            files: List of (filepath, content) pairs
+
+        Returns:
+            Formatted content for each file, or None where prettier failed
+        """
+        self._next_id += 1
+        request = {
+            "id": self._next_id,
+            "files": [{"filepath": filepath, "content": content} for filepath, content in files],
+        }
+        self.process.stdin.write(json.dumps(request).encode() + b"\n")
+        await self.process.stdin.drain()
+
+        line = await asyncio.wait_for(self.process.stdout.readline(), PRETTIER_TIMEOUT)
+        if not line:
+            raise ConnectionError("prettier worker exited")
+        response = json.loads(line)
+        if response.get("id") != self._next_id:
+            raise ConnectionError("prettier worker returned an unexpected response")
+        return [result.get("formatted") for result in response["results"]]
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def stop(self) -> None:
+        """Terminate the process."""
+        if self.process is None:
+            return
+        if self.process.returncode is None:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+        await self.process.wait()
+        self.process = None
+
+class PrettierPool:
+    """Pool of persistent prettier workers fed from a shared queue.
+
+    Pending files are drained from the queue into batches of up to
+    PRETTIER_BATCH_SIZE per request. A worker that crashes or times out is
+    restarted and the failed batch is retried one file at a time, so only
+    the file at fault is returned unchanged. A worker that cannot be
+    restarted PRETTIER_MAX_RESTARTS times in a row is retired and leaves
+    the queue to the others; once none are left, or when Node or prettier
+    is unavailable, every file is returned unchanged.
+    """
+
+    def __init__(self, command: Optional[Sequence[str]] = None, size: int = PRETTIER_WORKERS):
+        self.command = list(command) if command else _default_command()
+        self.size = max(1, size)
+        self.available = bool(self.command)
+        self.version: Optional[str] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._workers = 0  # Workers still taking files from the queue
+        self._started = False
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    async def format(self, content: str, file_extension: str) -> Tuple[str, str]:
+        """Format web code, falling back to the original content.
+
+        Args:
+            content: Web code to format
+            file_extension: File extension used to pick the prettier parser
+
+        Returns:
+            Tuple of (formatted code, formatter used: prettier or raw)
+        """
+        if not await self.ensure_started():
+            return content, "raw"
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((f"file{file_extension}", content, future))
+        formatted = await future
+        if formatted is None:
+            return content, "raw"
+        return formatted, "prettier"
+
+    async def ensure_started(self) -> bool:
+        """Start the workers if needed.
+
+        Returns:
+            True if prettier is available
+        """
+        if not self.available:
+            return False
+        if not self._started:
+            if self._start_lock is None:
+                self._start_lock = asyncio.Lock()
+            async with self._start_lock:
+                if not self._started:
+                    await self._start()
+        return self.available
+
+    async def _start(self) -> None:
+        first = PrettierWorker(self.command)
+        if await first.start():
+            self.version = first.version
+            self._queue = asyncio.Queue()
+            self._workers = self.size
+            self._tasks = [asyncio.create_task(self._run_worker(first))]
+            for _ in range(self.size - 1):
+                self._tasks.append(asyncio.create_task(self._run_worker(PrettierWorker(self.command))))
+        else:
+            self.available = False
+        self._started = True
+
+    async def _run_worker(self, worker: PrettierWorker) -> None:
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                while len(batch) < PRETTIER_BATCH_SIZE and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+
+                pending = [batch]
+                while pending:
+                    chunk = pending.pop()
+                    if not worker.alive and not await _restart(worker):
+                        # Hand the files back to the other workers and retire
+                        for unformatted in (chunk, *pending):
+                            for item in unformatted:
+                                self._queue.put_nowait(item)
+                        self._retire()
+                        return
+                    try:
+                        results = await worker.format_files([(filepath, content) for filepath, content, _ in chunk])
+                    except (asyncio.TimeoutError, ConnectionError, ValueError, KeyError, OSError):
+                        # Crashed or stuck; restart and retry the files one at a time
+                        # so only the one at fault comes back raw
+                        await worker.stop()
+                        if len(chunk) > 1:
+                            pending.extend([item] for item in reversed(chunk))
+                            continue
+                        results = [None]
+                    _resolve(chunk, results)
+        finally:
+            await worker.stop()
+
+    def _retire(self) -> None:
+        """Take a worker out of the pool; without workers, fail what is queued."""
+        self._workers -= 1
+        if self._workers > 0:
+            return
+        print("\nWarning: prettier workers keep failing to start; web files are included unformatted")
+        self.available = False
+        while not self._queue.empty():
+            _resolve([self._queue.get_nowait()], [None])
+
+    async def close(self) -> None:
+        """Stop all workers."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._workers = 0
+        self._started = False
+        self._start_lock = None
+        self.available = bool(self.command)
+
+async def _restart(worker: PrettierWorker) -> bool:
+    """Start a stopped worker, trying up to PRETTIER_MAX_RESTARTS times."""
+    for _ in range(PRETTIER_MAX_RESTARTS):
+        if await worker.start():
+            return True
+    return False
+
+def _resolve(batch: list, results: List[Optional[str]]) -> None:
+    for (_, _, future), result in zip(batch, results):
+        if not future.done():
+            future.set_result(result)
+
+def _default_command() -> List[str]:
+    """Build the worker command, or an empty list when Node is missing."""
+    if PRETTIER_WORKER_CMD:
+        return list(PRETTIER_WORKER_CMD)
+    node = shutil.which("node")
+    if node is None:
+        return []
+    return [node, WORKER_SCRIPT]
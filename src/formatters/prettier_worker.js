@@ -0,0 +1,67 @@
+// Long-lived prettier worker.
+//
+// Protocol: one JSON object per line on stdin and stdout.
+//   startup  -> {"ready": true, "version": "3.x"} or {"ready": false, "error": "..."}
+//   request  <- {"id": 1, "files": [{"filepath": "a.js", "content": "..."}]}
+//   response -> {"id": 1, "results": [{"formatted": "..."} | {"error": "..."}]}
+"use strict";
+
+const path = require("path");
+const readline = require("readline");
+
+function loadPrettier() {
+  const searchPaths = [process.cwd(), __dirname];
+  if (process.env.NODE_PATH) {
+    searchPaths.push(...process.env.NODE_PATH.split(path.delimiter));
+  }
+  searchPaths.push(path.join(path.dirname(process.execPath), "..", "lib", "node_modules"));
+  return require(require.resolve("prettier", { paths: searchPaths }));
+}
+
+function send(message) {
+  process.stdout.write(JSON.stringify(message) + "\n");
+}
+
+let prettier;
+try {
+  prettier = loadPrettier();
+} catch (err) {
+  send({ ready: false, error: String(err && err.message ? err.message : err) });
+  process.exit(0);
+}
+
+send({ ready: true, version: prettier.version });
+
+async function formatOne(file) {
+  try {
+    // Same behaviour as `prettier --no-config`: infer the parser from the path only
+    const formatted = await prettier.format(file.content, { filepath: file.filepath });
+    return { formatted };
+  } catch (err) {
+    return { error: String(err && err.message ? err.message : err) };
+  }
+}
+
+const rl = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+let queue = Promise.resolve();
+
+rl.on("line", (line) => {
+  queue = queue.then(async () => {
+    let request;
+    try {
+      request = JSON.parse(line);
+    } catch (err) {
+      send({ id: null, error: "invalid request" });
+      return;
+    }
+    const results = [];
+    for (const file of request.files || []) {
+      results.push(await formatOne(file));
+    }
+    send({ id: request.id, results });
+  });
+});
+
+rl.on("close", () => {
+  queue.then(() => process.exit(0));
+});
@@ -0,0 +1,111 @@
+import signal
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from src.config import settings
+from src.config.settings import FORMAT_TIMEOUT
+from src.utils.async_utils import shutdown_executor
+
+_executor: Optional[ProcessPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None  # One per worker so timeouts exclude queueing
+
+def _init_worker() -> None:
+    """Import the formatters once per worker process.
+
+    Ctrl-C is left to the parent, which shuts the pool down.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import black  # noqa: F401
+    import autopep8  # noqa: F401
+
+def _ready() -> None:
+    """No-op run once per worker to have it spawned and initialized."""
+
+def _format_python_sync(content: str) -> Tuple[str, str]:
+    """Format Python code using black or autopep8 inside a worker process.
+    
+    Args:
+        content: Python code to format
+        
+    Returns:
+        Tuple of (formatted code, formatter used: black, autopep8 or raw)
+    """
+    import black
+    import autopep8
+
+    try:
+        return black.format_str(content, mode=black.FileMode()), "black"
+    except Exception:
+        try:
+            return autopep8.fix_code(content), "autopep8"
+        except Exception:
+            return content, "raw"
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Return the shared process pool, starting it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.FORMAT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+    return _executor
+
+async def start() -> None:
+    """Spawn the worker processes and import the formatters in each."""
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    await asyncio.gather(*(loop.run_in_executor(executor, _ready) for _ in range(settings.FORMAT_WORKERS)))
+
+def _restart_executor(executor: ProcessPoolExecutor) -> None:
+    """Kill a stuck or broken pool so the next call starts a fresh one.
+    
+    Args:
+        executor: The pool that timed out or broke
+    """
+    global _executor
+    if _executor is executor:
+        _executor = None
+    for process in list((executor._processes or {}).values()):
+        process.terminate()
+    shutdown_executor(executor, wait=False)
+
+async def format_python(content: str) -> Tuple[str, str]:
+    """Format Python code in the process pool.
+    
+    Args:
+        content: Python code to format
+        
+    Returns:
+        Tuple of (formatted code, formatter used); the original content
+        and "timeout" when the file could not be formatted in time
+    """
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(settings.FORMAT_WORKERS)
+    loop = asyncio.get_running_loop()
+    async with _slots:
+        for _ in range(2):
+            executor = _get_executor()
+            try:
+                future = loop.run_in_executor(executor, _format_python_sync, content)
+                return await asyncio.wait_for(future, FORMAT_TIMEOUT)
+            except asyncio.TimeoutError:
+                _restart_executor(executor)
+                return content, "timeout"
+            except BrokenProcessPool:
+                # Another file's timeout took the pool down; retry once on a new one
+                _restart_executor(executor)
+        return content, "timeout"
+
+def shutdown() -> None:
+    """Stop the worker processes."""
+    global _executor, _slots
+    if _executor is not None:
+        shutdown_executor(_executor)
+        _executor = None
+    _slots = None
@@ -1,55 +1,290 @@
 import os
 import sys
 import asyncio
+import argparse
+import json
 import time
-from src.config.settings import OUTPUT_DIR
-from src.utils.file_utils import os_path_join, os_path_basename, os_path_abspath, os_path_exists, os_makedirs, get_file_tree, get_files_to_process
-from src.processors.pdf_processor import PDFProcessor
-from src.processors.txt_processor import TXTProcessor
-
-async def main():
-    if len(sys.argv) != 2:
-        print("Usage: python -m src.main <repository_path>")
-        sys.exit(1)
+from typing import Any, Callable, Dict, List, Optional
+from src.config.settings import OUTPUT_DIR, FORMAT_CACHE_FILE, PDF_SHARDS, PDF_LINE_NUMBERS, TXT_SHARD_SIZE
+from src.utils.file_utils import os_path_join, os_path_basename, os_path_abspath, os_path_exists, os_makedirs
+
+# Output formats accepted by --format and the sinks each one needs. The
+# processors, formatters and reportlab are imported only once a run needs
+# them, so a TXT-only conversion never loads the PDF stack.
+OUTPUT_FORMATS = {"txt": ("txt",), "pdf": ("pdf",), "both": ("pdf", "txt")}
+
+def build_parser(parser_class: type = argparse.ArgumentParser, **kwargs) -> argparse.ArgumentParser:
+    """Build the command line parser.
+
+    Args:
+        parser_class: ArgumentParser subclass to instantiate
+        kwargs: Extra keyword arguments for the parser
+
+    Returns:
+        Parser for the conversion options
+    """
+    parser = parser_class(
+        prog="python -m src.main",
+        description="Convert a repository's contents into PDF and TXT files.",
+        **kwargs,
+    )
+    parser.add_argument("repo_path", help="Path to the repository to convert")
+    parser.add_argument(
+        "--output-dir", default=OUTPUT_DIR,
+        help="Directory for the generated files (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--format", choices=sorted(OUTPUT_FORMATS), default="both",
+        help="Which files to generate (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cache-path", default=None,
+        help=f"Location of the persistent formatting cache (default: {FORMAT_CACHE_FILE} in the output directory)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Disable the persistent formatting cache",
+    )
+    parser.add_argument(
+        "--no-gitignore", action="store_true",
+        help="Do not honour the repository's .gitignore/.ignore files",
+    )
+    parser.add_argument(
+        "--pdf-shards", type=int, default=PDF_SHARDS, metavar="N",
+        help="Render the PDF in N parallel processes and concatenate the parts (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--line-numbers", action="store_true", default=PDF_LINE_NUMBERS,
+        help="Print source line numbers in a gutter next to the code in the PDF",
+    )
+    parser.add_argument(
+        "--txt-shard-mb", type=float, default=TXT_SHARD_SIZE / (1024 * 1024), metavar="MB",
+        help="Split the TXT output into shards of at most MB megabytes, each with its own index; "
+             "0 writes a single file (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--max-memory", type=float, default=None, metavar="MB",
+        help="Resident memory to stay under by slowing read-ahead; defaults to a share of the "
+             "host or container memory limit",
+    )
+    parser.add_argument(
+        "--no-dedup", action="store_true",
+        help="Write every copy of identical files in full instead of referencing the first copy",
+    )
+    parser.add_argument(
+        "--git-rev", metavar="REV",
+        help="Read the files tracked at a git revision (commit, branch or tag) instead of the working tree",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Only re-read and re-format files changed since the previous incremental run",
+    )
+    parser.add_argument(
+        "--profile", metavar="PATH",
+        help="Write a JSON profile of the run (stage times, per-file latency, formatters, memory) to PATH",
+    )
+    parser.add_argument(
+        "--profile-top", type=int, default=10, metavar="N",
+        help="Number of slowest files to report when profiling (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cprofile", metavar="PATH",
+        help="Run the pipeline under cProfile and save the stats to PATH",
+    )
+    return parser
+
+def parse_args(argv: Optional[List[str]] = None,
+               parser: Optional[argparse.ArgumentParser] = None) -> argparse.Namespace:
+    """Parse and check command line arguments.
+
+    Args:
+        argv: Arguments to parse, defaults to sys.argv
+        parser: Parser to use, defaults to build_parser()
 
-    repo_path = sys.argv[1]
+    Returns:
+        Parsed arguments
+    """
+    if parser is None:
+        parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.cache_path is None:
+        args.cache_path = os.path.join(args.output_dir, FORMAT_CACHE_FILE)
+    if args.incremental and "txt" not in OUTPUT_FORMATS[args.format]:
+        parser.error("--incremental reuses sections of the TXT output and needs --format txt or both")
+    if args.incremental and args.txt_shard_mb:
+        parser.error("--incremental cannot be combined with --txt-shard-mb")
+    return args
 
+async def convert(args: argparse.Namespace, log: Callable[[str], None] = print,
+                  progress: bool = True) -> Dict[str, Any]:
+    """Convert one repository.
+
+    Formatter pools and caches are left running so they can be reused by
+    the next conversion; call shutdown_formatters() when done.
+
+    Args:
+        args: Options as returned by parse_args
+        log: Receives progress messages
+        progress: Show a progress bar while processing files
+
+    Returns:
+        Summary of the conversion
+
+    Raises:
+        ValueError: If the repository or revision cannot be read
+    """
+    from src.processors.pipeline import Pipeline
+    from src.processors.manifest import Manifest
+    from src.formatters.code_formatter import format_cache_stats, memory_cache_stats
+    from src.utils import metrics
+
+    repo_path = args.repo_path
+    formats = OUTPUT_FORMATS[args.format]
     if not await os_path_exists(repo_path):
-        print(f"Error: Repository path '{repo_path}' does not exist")
-        sys.exit(1)
+        raise ValueError(f"Repository path '{repo_path}' does not exist")
 
     start_time = time.time()
+    output_dir = args.output_dir
 
     # Create output directory if it doesn't exist
-    await os_makedirs(OUTPUT_DIR, exist_ok=True)
+    await os_makedirs(output_dir, exist_ok=True)
 
     # Get repository name and setup output paths
     repo_name = os_path_basename(os_path_abspath(repo_path))
-    pdf_path = os_path_join(OUTPUT_DIR, f"{repo_name}_context.pdf")
-    txt_path = os_path_join(OUTPUT_DIR, f"{repo_name}_context.txt")
+    pdf_path = os_path_join(output_dir, f"{repo_name}_context.pdf")
+    txt_path = os_path_join(output_dir, f"{repo_name}_context.txt")
+    manifest_path = os_path_join(output_dir, f"{repo_name}_context.manifest.json")
 
-    print("\n=== Repository to PDF/TXT Converter ===")
-    print(f"Repository: {repo_name}")
-    print(f"Output directory: {OUTPUT_DIR}")
-    print("=" * 40)
+    log(f"\n=== Repository to {'/'.join(f.upper() for f in formats)} Converter ===")
+    log(f"Repository: {repo_name}")
+    log(f"Output directory: {output_dir}")
+    log("=" * 40)
+
+    run_metrics = metrics.start_run() if args.profile else None
 
     # Get files to process
-    print("\nCollecting files...")
-    files_to_process = await get_files_to_process(repo_path)
+    log("\nCollecting files...")
+    source = None
+    with metrics.stage("scan"):
+        if args.git_rev:
+            from src.utils.git_source import load_git_source
+            index, source = await load_git_source(repo_path, args.git_rev)
+            log(f"Reading revision: {args.git_rev}")
+        else:
+            from src.utils.repo_scanner import scan_repository
+            index = await scan_repository(repo_path, use_gitignore=not args.no_gitignore)
+    files_to_process = index.files
     total_files = len(files_to_process)
-    print(f"Found {total_files} files to process")
-
-    # Generate PDF
-    print("\nGenerating PDF...")
-    pdf_processor = PDFProcessor(repo_path, pdf_path)
-    await pdf_processor.process(files_to_process)
-    print(f"PDF generated successfully: {pdf_path}")
-
-    # Generate TXT
-    print("\nGenerating TXT...")
-    txt_processor = TXTProcessor(repo_path, txt_path)
-    await txt_processor.process(files_to_process)
-    print(f"Text file generated successfully: {txt_path}")
+    log(f"Found {total_files} files to process")
+
+    # Generate every requested output from a single read of the repository
+    log(f"\nGenerating {' and '.join(f.upper() for f in formats)}...")
+    sinks = []
+    pdf_processor = txt_processor = None
+    if "pdf" in formats:
+        if args.pdf_shards > 1:
+            from src.processors.sharded_pdf_processor import ShardedPDFProcessor
+            pdf_processor = ShardedPDFProcessor(repo_path, pdf_path, total_files, args.pdf_shards,
+                                                line_numbers=args.line_numbers)
+        else:
+            from src.processors.pdf_processor import PDFProcessor
+            pdf_processor = PDFProcessor(repo_path, pdf_path, line_numbers=args.line_numbers)
+        sinks.append(pdf_processor)
+    if "txt" in formats:
+        from src.processors.txt_processor import TXTProcessor
+        txt_processor = TXTProcessor(repo_path, txt_path, shard_size=int(args.txt_shard_mb * 1024 * 1024))
+        sinks.append(txt_processor)
+    previous = Manifest.load(manifest_path, txt_path) if args.incremental else None
+    pipeline = Pipeline(repo_path, sinks, previous=previous, source=source, progress=progress,
+                        dedup=not args.no_dedup,
+                        memory_ceiling=int(args.max_memory * 1024 * 1024) if args.max_memory else None)
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    pipeline_start = time.time()
+    try:
+        with metrics.stage("pipeline"):
+            await pipeline.run(files_to_process, index)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+        if previous is not None:
+            previous.close()
+        if source is not None:
+            await source.close()
+    pipeline_time = time.time() - pipeline_start
+    output_bytes = 0
+    if pdf_processor is not None:
+        log(f"PDF generated successfully: {pdf_path}")
+        output_bytes += os.path.getsize(pdf_path)
+    if txt_processor is not None:
+        for path in txt_processor.paths:
+            log(f"Text file generated successfully: {path}")
+        output_bytes += txt_processor.bytes_written
+    log(f"Output: {output_bytes / (1024 * 1024):.1f}MB written at "
+        f"{output_bytes / (1024 * 1024) / max(pipeline_time, 1e-9):.1f}MB/s")
+
+    governor = pipeline.governor
+    if governor.throttled:
+        log(f"Memory: read-ahead cut {governor.throttled} times to stay under "
+            f"{governor.ceiling / (1024 * 1024):.0f}MB (peak {governor.peak_rss / (1024 * 1024):.0f}MB, "
+            f"down to {governor.min_tasks} of {governor.task_limit} files in flight)")
+
+    if pipeline.duplicate_files:
+        log(f"Deduplicated: {pipeline.duplicate_files} files identical to an earlier file")
+
+    if args.incremental:
+        with metrics.stage("manifest"):
+            Manifest.from_run(pipeline.records, txt_processor.sections, txt_path).save(manifest_path)
+        log(f"Incremental: reused {pipeline.reused_files} of {total_files} files from the previous run")
+
+    cache_stats = format_cache_stats()
+    if cache_stats is not None:
+        hits, misses, hit_rate = cache_stats
+        log(f"Format cache: {hits} hits, {misses} misses ({hit_rate:.1%} hit rate)")
+    if run_metrics is not None:
+        memory_hits, memory_misses = memory_cache_stats()
+        run_metrics.cache["memory"] = {"hits": memory_hits, "misses": memory_misses}
+        run_metrics.governor = governor.to_dict()
+        if cache_stats is not None:
+            run_metrics.cache["disk"] = {"hits": cache_stats[0], "misses": cache_stats[1]}
+        metrics.end_run()
+        with open(args.profile, 'w', encoding='utf-8') as f:
+            json.dump(run_metrics.to_dict(args.profile_top), f, indent=2)
+        log(f"\n{run_metrics.report(args.profile_top)}")
+        log(f"Profile written to: {args.profile}")
+    if args.cprofile:
+        log(f"cProfile stats written to: {args.cprofile} (view with: python -m pstats {args.cprofile})")
+
+    return {
+        "repo": repo_name,
+        "files": total_files,
+        "reused_files": pipeline.reused_files,
+        "duplicate_files": pipeline.duplicate_files,
+        "pdf_path": pdf_path if pdf_processor is not None else None,
+        "txt_path": txt_path if txt_processor is not None and not txt_processor.shard_size else None,
+        "txt_shards": txt_processor.paths if txt_processor is not None and txt_processor.shard_size else None,
+        "output_bytes": output_bytes,
+        "seconds": round(time.time() - start_time, 3),
+    }
+
+async def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    start_time = time.time()
+
+    from src.formatters.code_formatter import configure_format_cache, shutdown_formatters
+
+    configure_format_cache(None if args.no_cache else args.cache_path)
+    try:
+        await convert(args)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        await shutdown_formatters()
 
     end_time = time.time()
     print(f"\nTotal execution time: {end_time - start_time:.2f} seconds")
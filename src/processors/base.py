@@ -0,0 +1,27 @@
+class OutputSink:
+    """Base class for outputs fed by the shared ingest pipeline.
+
+    Each file is read, cleaned and formatted once by the pipeline and the
+    result is handed to every sink in order.
+    """
+
+    async def open(self, tree_content: str) -> None:
+        """Start the output and write the repository structure.
+
+        Args:
+            tree_content: Rendered directory tree of the repository
+        """
+        raise NotImplementedError
+
+    async def write_file(self, rel_path: str, content: str) -> None:
+        """Append one file section to the output.
+
+        Args:
+            rel_path: Path of the file relative to the repository root
+            content: Cleaned and formatted file content
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Finish the output and release any resources."""
+        raise NotImplementedError
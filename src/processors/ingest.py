@@ -0,0 +1,262 @@
+import os
+import time
+import hashlib
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import aiofiles
+
+from src.config import settings
+from src.config.settings import (
+    PREFETCH_MAX_BYTES, MAX_FILE_SIZE, CHUNK_SIZE, SNIFF_SIZE, TEXT_SUBSTITUTIONS, DEDUP_FILES, DEDUP_MIN_SIZE,
+    LARGE_FILE_MODE, EXCERPT_MAX_BYTES,
+)
+from src.formatters.code_formatter import format_code
+from src.processors.manifest import Manifest
+from src.utils.encoding import sniff_encoding, decode_text
+from src.utils.async_utils import ordered_prefetch
+from src.utils.excerpt import read_excerpt
+from src.utils.governor import ResourceGovernor
+from src.utils.metrics import FileMetrics, record_formatter, track_file
+from src.utils.git_source import GitSource
+
+_SUBSTITUTIONS = tuple(TEXT_SUBSTITUTIONS.items())
+_ASCII_SUBSTITUTIONS = tuple((old, new) for old, new in _SUBSTITUTIONS if old.isascii())
+
+@dataclass
+class IngestedFile:
+    """A file after reading, cleaning and formatting."""
+    rel_path: str
+    content: Optional[str]  # None only while a duplicate's reference is pending
+    size: int = 0
+    mtime_ns: int = 0
+    digest: Optional[str] = None  # Hash of the raw content; None for placeholders and duplicates
+    reused: bool = False  # Content was copied from the previous run
+    duplicate_of: Optional[str] = None  # Earlier file with identical content
+
+async def iter_file_contents(repo_path: str, files_to_process: List[str],
+                             previous: Optional[Manifest] = None,
+                             stats: Optional[Dict[str, os.stat_result]] = None,
+                             source: Optional[GitSource] = None,
+                             dedup: bool = DEDUP_FILES,
+                             governor: Optional[ResourceGovernor] = None) -> AsyncIterator[IngestedFile]:
+    """Read, clean and format each file exactly once.
+
+    With dedup, a file whose content is identical to an earlier file is
+    emitted as a reference to it instead. Readers claim each content hash
+    for the earliest file that has it, so later copies skip formatting
+    (and in git mode, reading); which file comes first is decided here, in
+    input order, so references always point backwards.
+
+    Args:
+        repo_path: Path to the repository
+        files_to_process: List of files to process
+        previous: Manifest of the previous run; unchanged files are copied from it
+        stats: Stat results already collected by the repository scan
+        source: Read files from a git revision instead of the working tree
+        dedup: Emit identical files as references to their first occurrence
+        governor: Adjusts read-ahead to stay under a memory ceiling
+
+    Yields:
+        IngestedFile for each file, in input order
+    """
+    def read_size(file_path: str) -> int:
+        if source is not None:
+            size = source.blob_for(file_path).size
+        else:
+            stat = stats.get(file_path) if stats is not None else None
+            # Unknown sizes count as one chunk
+            size = stat.st_size if stat is not None else CHUNK_SIZE
+        # Only the head and tail of oversized files are read
+        if size > MAX_FILE_SIZE:
+            return 2 * EXCERPT_MAX_BYTES if LARGE_FILE_MODE == "excerpt" and source is None else 0
+        return size
+
+    claims = _Claims(files_to_process) if dedup else None
+    first_paths: Dict[str, str] = {}
+    async for ingested in ordered_prefetch(
+        files_to_process,
+        lambda file_path: _process_file(repo_path, file_path, previous, stats, source, claims),
+        settings.MAX_CONCURRENT_TASKS,
+        max_bytes=PREFETCH_MAX_BYTES,
+        size_of=read_size,
+        governor=governor,
+    ):
+        if dedup and ingested.digest is not None and ingested.size >= DEDUP_MIN_SIZE:
+            first = first_paths.setdefault(ingested.digest, ingested.rel_path)
+            if first != ingested.rel_path:
+                record_formatter("duplicate")
+                ingested = IngestedFile(ingested.rel_path, f"[Identical to {first}]",
+                                        ingested.size, ingested.mtime_ns, duplicate_of=first)
+            elif ingested.content is None:
+                # The file holding the claim produced no section; format this copy instead
+                file_path = os.path.join(repo_path, ingested.rel_path)
+                ingested = await _process_file(repo_path, file_path, previous, stats, source)
+        yield ingested
+
+class _Claims:
+    """Earliest input position seen so far for each content hash."""
+
+    def __init__(self, files: List[str]):
+        self._positions = {file_path: i for i, file_path in enumerate(files)}
+        self._first: Dict[str, int] = {}
+
+    def is_later_copy(self, file_path: str, digest: str) -> bool:
+        """Claim digest for file_path unless an earlier file already has it."""
+        position = self._positions[file_path]
+        first = self._first.get(digest)
+        if first is not None and first < position:
+            return True
+        self._first[digest] = position
+        return False
+
+async def _process_file(repo_path: str, file_path: str, previous: Optional[Manifest] = None,
+                        stats: Optional[Dict[str, os.stat_result]] = None,
+                        source: Optional[GitSource] = None, claims: Optional[_Claims] = None) -> IngestedFile:
+    """Process a single file.
+
+    Args:
+        repo_path: Path to the repository
+        file_path: Path to the file
+        previous: Manifest of the previous run in incremental mode
+        stats: Stat results already collected by the repository scan
+        source: Read the file from a git revision instead of the working tree
+        claims: Content hashes claimed by earlier files, when deduplicating
+
+    Returns:
+        The ingested file
+    """
+    rel_path = os.path.relpath(file_path, repo_path)
+    with track_file(rel_path) as measured:
+        ingested = await _ingest_file(file_path, rel_path, previous, stats, source, claims, measured)
+        if measured is not None and ingested.content is not None:
+            measured.bytes_out = len(ingested.content.encode('utf-8'))
+        return ingested
+
+async def _ingest_file(file_path: str, rel_path: str, previous: Optional[Manifest],
+                       stats: Optional[Dict[str, os.stat_result]], source: Optional[GitSource],
+                       claims: Optional[_Claims], measured: Optional[FileMetrics]) -> IngestedFile:
+    """Read, clean and format a file, recording timings on measured if given."""
+    try:
+        blob = source.blob_for(file_path) if source is not None else None
+        if blob is not None:
+            # Blob ids identify content, so they replace the stat check and the hash
+            size, mtime_ns, digest = blob.size, 0, f"git:{blob.oid}"
+        else:
+            stat = stats.get(file_path) if stats is not None else None
+            if stat is None:
+                stat = os.stat(file_path)
+            size, mtime_ns, digest = stat.st_size, stat.st_mtime_ns, None
+        entry = previous.lookup(rel_path) if previous is not None else None
+        if entry is not None and (entry["hash"] == digest if blob is not None
+                                  else entry["size"] == size and entry["mtime_ns"] == mtime_ns):
+            record_formatter("reused")
+            return IngestedFile(rel_path, previous.read_content(entry), size,
+                                mtime_ns, entry["hash"], reused=True)
+
+        try:
+            if size > MAX_FILE_SIZE:
+                return await _large_file(file_path, rel_path, size, mtime_ns, blob is not None, measured)
+            if claims is not None and digest is not None and size >= DEDUP_MIN_SIZE \
+                    and claims.is_later_copy(file_path, digest):
+                return IngestedFile(rel_path, None, size, mtime_ns, digest)
+
+            start = time.perf_counter()
+            if blob is not None:
+                encoding, data = await source.read_bytes(file_path)
+            else:
+                encoding, data = await read_file_bytes(file_path)
+            if measured is not None:
+                measured.read_s = time.perf_counter() - start
+                measured.bytes_in = len(data)
+            if encoding is None:
+                return IngestedFile(rel_path, "[Binary file content]")
+            if digest is None:
+                digest = content_digest(data)
+                if entry is not None and entry["hash"] == digest:
+                    # Touched but unchanged: keep the previous formatting
+                    record_formatter("reused")
+                    return IngestedFile(rel_path, previous.read_content(entry), size,
+                                        mtime_ns, digest, reused=True)
+                if claims is not None and size >= DEDUP_MIN_SIZE and claims.is_later_copy(file_path, digest):
+                    return IngestedFile(rel_path, None, size, mtime_ns, digest)
+
+            file_extension = os.path.splitext(file_path)[1].lower()
+            start = time.perf_counter()
+            content = await format_code(clean_text(decode_text(data, encoding)), file_extension)
+            if measured is not None:
+                measured.format_s = time.perf_counter() - start
+            return IngestedFile(rel_path, content, size, mtime_ns, digest)
+        except Exception as e:
+            return IngestedFile(rel_path, f"[Error reading file: {str(e)}]")
+    except Exception as e:
+        print(f"\nError processing file {file_path}: {str(e)}")
+        return IngestedFile(rel_path, f"[Error processing file: {str(e)}]")
+
+async def _large_file(file_path: str, rel_path: str, size: int, mtime_ns: int, from_git: bool,
+                      measured: Optional[FileMetrics]) -> IngestedFile:
+    """Excerpt a file over MAX_FILE_SIZE, or skip it.
+
+    Excerpts are cleaned but not formatted, since a formatter would reject
+    a fragment of the file. Blobs in git mode cannot be memory-mapped and
+    are always skipped.
+    """
+    placeholder = f"[File too large to process: {size / (1024*1024):.1f}MB]"
+    if LARGE_FILE_MODE != "excerpt" or from_git:
+        return IngestedFile(rel_path, placeholder)
+    start = time.perf_counter()
+    encoding, excerpt = await read_excerpt(file_path)
+    if measured is not None:
+        measured.read_s = time.perf_counter() - start
+        measured.bytes_in = size
+    if encoding is None:
+        return IngestedFile(rel_path, "[Binary file content]")
+    if excerpt is None:
+        return IngestedFile(rel_path, placeholder)
+    record_formatter("excerpt")
+    return IngestedFile(rel_path, clean_text(excerpt), size, mtime_ns)
+
+async def read_file_bytes(file_path: str) -> Tuple[Optional[str], bytes]:
+    """Read a file as bytes, stopping after the prefix if it is binary.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        (encoding, raw content); encoding is None and the content only the
+        sniffed prefix when the file is binary
+    """
+    async with aiofiles.open(file_path, 'rb') as f:
+        prefix = await f.read(SNIFF_SIZE)
+        encoding = sniff_encoding(prefix)
+        if encoding is None:
+            return None, prefix
+        content = [prefix]
+        while True:
+            chunk = await f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            content.append(chunk)
+    return encoding, b''.join(content)
+
+def clean_text(content: str) -> str:
+    """Expand tabs and remove block characters.
+
+    Applies TEXT_SUBSTITUTIONS. Characters that do not occur are skipped
+    after a containment check, and ASCII-only content (known without a
+    scan) is only checked for ASCII keys. Content with other non-ASCII
+    text still costs a scan per key.
+
+    Args:
+        content: Raw file content
+
+    Returns:
+        Cleaned content
+    """
+    for old, new in _ASCII_SUBSTITUTIONS if content.isascii() else _SUBSTITUTIONS:
+        if old in content:
+            content = content.replace(old, new)
+    return content
+
+def content_digest(data: bytes) -> str:
+    """Hash raw file content for change detection."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
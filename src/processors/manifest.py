@@ -0,0 +1,121 @@
+import os
+import json
+from typing import Dict, Iterable, Optional, Tuple
+
+MANIFEST_VERSION = 2
+
+class Manifest:
+    """Record of a previous run used by incremental mode.
+
+    For every emitted file the manifest stores its size, mtime, content
+    hash and the byte range of its formatted content in the TXT output, so
+    unchanged files can be copied from the previous output instead of being
+    read and formatted again.
+    """
+
+    def __init__(self, files: Dict[str, dict], txt_path: Optional[str] = None):
+        self.files = files
+        self.txt_path = txt_path
+        self._snapshot = None
+        self._snapshot_path: Optional[str] = None
+
+    @classmethod
+    def load(cls, manifest_path: str, txt_path: str) -> Optional["Manifest"]:
+        """Load the manifest of the previous run, if it is still usable.
+
+        The previous TXT output is moved aside so sections can be copied
+        from it while the new output is written.
+
+        Args:
+            manifest_path: Path of the manifest file
+            txt_path: Path of the TXT output the manifest describes
+
+        Returns:
+            The manifest, or None if there is no usable previous run
+        """
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            txt_stat = os.stat(txt_path)
+        except (OSError, ValueError):
+            return None
+        # The TXT output must be exactly the one this manifest describes
+        if (data.get("version") != MANIFEST_VERSION
+                or data.get("txt_size") != txt_stat.st_size
+                or data.get("txt_mtime_ns") != txt_stat.st_mtime_ns):
+            return None
+
+        manifest = cls(data.get("files", {}), txt_path)
+        manifest._snapshot_path = txt_path + ".prev"
+        os.replace(txt_path, manifest._snapshot_path)
+        manifest._snapshot = open(manifest._snapshot_path, 'rb')
+        return manifest
+
+    def lookup(self, rel_path: str) -> Optional[dict]:
+        """Return the previous entry for a file."""
+        return self.files.get(rel_path)
+
+    def read_content(self, entry: dict) -> str:
+        """Copy a file's formatted content from the previous TXT output.
+
+        Args:
+            entry: Entry returned by lookup
+
+        Returns:
+            The formatted content written by the previous run
+        """
+        self._snapshot.seek(entry["offset"])
+        return self._snapshot.read(entry["length"]).decode('utf-8')
+
+    def close(self) -> None:
+        """Release and delete the previous TXT output."""
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+        if self._snapshot_path and os.path.exists(self._snapshot_path):
+            os.remove(self._snapshot_path)
+
+    @classmethod
+    def from_run(cls, records: Iterable[Tuple[str, int, int, Optional[str]]],
+                 sections: Dict[str, Tuple[int, int]], txt_path: str) -> "Manifest":
+        """Build a manifest from a finished run.
+
+        Args:
+            records: (rel_path, size, mtime_ns, digest) for each emitted file
+            sections: Byte range (offset, length) of each file's content in the TXT output
+            txt_path: Path of the TXT output
+
+        Returns:
+            Manifest describing the run
+        """
+        files = {}
+        for rel_path, size, mtime_ns, digest in records:
+            if digest is None or rel_path not in sections:
+                continue
+            offset, length = sections[rel_path]
+            files[rel_path] = {
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "hash": digest,
+                "offset": offset,
+                "length": length,
+            }
+        return cls(files, txt_path)
+
+    def save(self, manifest_path: str) -> None:
+        """Write the manifest next to the TXT output.
+
+        Args:
+            manifest_path: Path of the manifest file
+        """
+        txt_stat = os.stat(self.txt_path)
+        data = {
+            "version": MANIFEST_VERSION,
+            "txt_size": txt_stat.st_size,
+            "txt_mtime_ns": txt_stat.st_mtime_ns,
+            "files": self.files,
+        }
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, manifest_path)
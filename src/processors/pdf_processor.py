@@ -1,19 +1,175 @@
-import os
-from typing import List, Tuple
-import aiofiles
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Preformatted, PageBreak
+from reportlab.platypus import (
+    SimpleDocTemplate, Paragraph, Spacer, PageBreak, Frame, PageTemplate, Flowable,
+)
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from tqdm import tqdm
-import gc
+from reportlab.pdfbase import pdfdoc
+from reportlab.pdfgen import canvas
+from reportlab import rl_config
 
-from src.config.settings import BATCH_SIZE
-from src.utils.file_utils import os_path_join, os_path_basename, os_path_abspath, wrap_text, get_file_tree
-from src.formatters.code_formatter import format_code
+from src.config.settings import PDF_STREAMING, PDF_LINE_NUMBERS
+from src.utils.file_utils import os_path_basename, os_path_abspath, wrap_text
+from src.processors.base import OutputSink
+from src.processors.pipeline import Pipeline
+from src.utils.metrics import stage
 
-class PDFProcessor:
-    def __init__(self, repo_path: str, output_pdf: str):
+class StreamingCanvas(canvas.Canvas):
+    """Canvas that compresses each page as soon as it is finished.
+
+    ReportLab normally keeps every page's drawing operators as plain text
+    until the document is saved. Encoding them at showPage time keeps only
+    the compressed streams resident while a large document is laid out.
+    """
+
+    def showPage(self):
+        super().showPage()
+        page = self._doc.Pages.pages[-1]
+        if not page.compression or page.Contents or not page.stream:
+            return
+        filters = [pdfdoc.PDFBase85Encode, pdfdoc.PDFZCompress] if rl_config.useA85 else [pdfdoc.PDFZCompress]
+        content = page.stream
+        for f in reversed(filters):
+            content = f.encode(content)
+        stream = pdfdoc.PDFStream(content=content)
+        # A preset Filter entry tells PDFStream the content is already encoded
+        stream.dictionary["Filter"] = pdfdoc.PDFArray([pdfdoc.PDFName(f.pdfname) for f in filters])
+        stream.__Comment__ = "page stream"
+        page.Contents = stream
+        page.stream = None
+
+CODE_WIDTH = 80  # Characters per code line before wrapping
+GUTTER_FONT_SIZE = 7
+GUTTER_GAP = 6  # Points between the line numbers and the code
+
+@lru_cache(maxsize=None)
+def shared_styles() -> Tuple[ParagraphStyle, ParagraphStyle, ParagraphStyle]:
+    """Title, heading and code styles, built once per process."""
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        "CustomTitle", parent=styles["Heading1"], fontSize=24, spaceAfter=30
+    )
+    heading_style = ParagraphStyle(
+        "CustomHeading", parent=styles["Heading2"], fontSize=16, spaceAfter=12
+    )
+    code_style = ParagraphStyle(
+        "CodeStyle",
+        fontName="Courier",
+        fontSize=10,
+        leading=12,
+        wordWrap="CJK",
+        allowWidows=0,
+        allowOrphans=0,
+        splitLongWords=1,
+        spaceBefore=6,
+        spaceAfter=6
+    )
+    return title_style, heading_style, code_style
+
+class CodeBlock(Flowable):
+    """Preformatted text laid out from a range of a shared list of lines.
+
+    Draws exactly like Preformatted, including dropping blank lines at the
+    start and end of each piece, but splitting at a page break only creates
+    two views of the same list. Preformatted re-joins and re-splits the rest
+    of the text at every page, which makes long files quadratic to lay out.
+    """
+
+    def __init__(self, lines: Sequence[str], style: ParagraphStyle, start: int = 0, end: Optional[int] = None,
+                 numbers: Optional[Sequence[Optional[int]]] = None):
+        super().__init__()
+        self.style = style
+        self.all_lines = lines
+        self.numbers = numbers  # Source line number per line, None on wrapped continuations
+        end = len(lines) if end is None else end
+        while start < end and not lines[start].strip():
+            start += 1
+        while end > start and not lines[end - 1].strip():
+            end -= 1
+        self.start, self.end = start, end
+
+    def wrap(self, availWidth, availHeight):
+        self.width = availWidth
+        self.height = self.style.leading * (self.end - self.start)
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        if availHeight < self.style.leading:
+            return []
+        middle = self.start + int(availHeight / self.style.leading)
+        return [
+            CodeBlock(self.all_lines, self.style, self.start, middle, self.numbers),
+            CodeBlock(self.all_lines, self.style, middle, self.end, self.numbers),
+        ]
+
+    def draw(self):
+        style = self.style
+        canv = self.canv
+        top = self.height - style.fontSize
+        canv.addLiteral('%PreformattedPara')
+        if style.textColor:
+            canv.setFillColor(style.textColor)
+        text = canv.beginText(style.leftIndent, top)
+        text.setFont(style.fontName, style.fontSize, style.leading)
+        for i in range(self.start, self.end):
+            text.textLine(self.all_lines[i])
+        canv.drawText(text)
+        if self.numbers is not None:
+            self._draw_numbers(top)
+
+    def _draw_numbers(self, top: float) -> None:
+        style = self.style
+        canv = self.canv
+        canv.saveState()
+        canv.setFont(style.fontName, GUTTER_FONT_SIZE)
+        canv.setFillGray(0.5)
+        x = style.leftIndent - GUTTER_GAP
+        for row, i in enumerate(range(self.start, self.end)):
+            number = self.numbers[i]
+            if number is not None:
+                canv.drawRightString(x, top - row * style.leading, str(number))
+        canv.restoreState()
+
+def numbered_lines(content: str, width: int = CODE_WIDTH) -> Tuple[List[str], List[Optional[int]]]:
+    """Wrap content line by line, keeping each line's source line number.
+
+    Args:
+        content: Cleaned and formatted file content
+        width: Characters per line
+
+    Returns:
+        (wrapped lines, source line number of each, None on continuations)
+    """
+    lines: List[str] = []
+    numbers: List[Optional[int]] = []
+    for number, line in enumerate(content.split('\n'), 1):
+        pieces = wrap_text(line, width).split('\n') if len(line) > width else [line]
+        lines.extend(pieces)
+        numbers.append(number)
+        numbers.extend([None] * (len(pieces) - 1))
+    return lines, numbers
+
+class FileBookmark(Flowable):
+    """Zero-size flowable that adds an outline entry for a file section."""
+
+    def __init__(self, rel_path: str, file_pages: List[Tuple[str, int]]):
+        super().__init__()
+        self.rel_path = rel_path
+        self.file_pages = file_pages
+        self.width = self.height = 0
+
+    def draw(self):
+        canv = self.canv
+        key = f"file{len(self.file_pages)}"
+        canv.bookmarkPage(key)
+        canv.addOutlineEntry(self.rel_path, key, level=0)
+        self.file_pages.append((self.rel_path, canv.getPageNumber() - 1))
+
+class PDFProcessor(OutputSink):
+    def __init__(self, repo_path: str, output_pdf: str, streaming: bool = PDF_STREAMING,
+                 line_numbers: bool = PDF_LINE_NUMBERS):
         self.repo_path = repo_path
         self.output_pdf = output_pdf
         self.repo_name = os_path_basename(os_path_abspath(repo_path))
@@ -28,28 +184,17 @@ class PDFProcessor:
             bottomMargin=72,
         )
         
-        # Initialize styles
-        styles = getSampleStyleSheet()
-        self.title_style = ParagraphStyle(
-            "CustomTitle", parent=styles["Heading1"], fontSize=24, spaceAfter=30
-        )
-        self.heading_style = ParagraphStyle(
-            "CustomHeading", parent=styles["Heading2"], fontSize=16, spaceAfter=12
-        )
-        self.code_style = ParagraphStyle(
-            "CodeStyle",
-            fontName="Courier",
-            fontSize=10,
-            leading=12,
-            wordWrap="CJK",
-            allowWidows=0,
-            allowOrphans=0,
-            splitLongWords=1,
-            spaceBefore=6,
-            spaceAfter=6
-        )
-        
+        # Styles are shared by every processor in the process
+        self.title_style, self.heading_style, self.code_style = shared_styles()
+        self.line_numbers = line_numbers
+
+        # Streaming mode lays out and discards each file's flowables as it
+        # arrives; otherwise the whole story is kept and built at the end.
+        self.streaming = streaming
         self.story = []
+        self._building = False
+        # (rel_path, zero-based page index) where each file section starts
+        self.file_pages: List[Tuple[str, int]] = []
 
     async def process(self, files_to_process: List[str]) -> None:
         """Process files and generate PDF.
@@ -57,103 +202,122 @@ class PDFProcessor:
         Args:
             files_to_process: List of files to process
         """
+        await Pipeline(self.repo_path, [self]).run(files_to_process)
+
+    async def open(self, tree_content: str) -> None:
+        """Add the title page and repository structure.
+        
+        Args:
+            tree_content: Rendered directory tree of the repository
+        """
+        with stage("pdf_layout"):
+            self.begin()
+            self.add_front_matter(tree_content)
+
+    async def write_file(self, rel_path: str, content: str) -> None:
+        """Add a file section to the document.
+        
+        Args:
+            rel_path: Path of the file relative to the repository root
+            content: Cleaned and formatted file content
+        """
+        with stage("pdf_layout"):
+            self.add_file(rel_path, content)
+
+    async def close(self) -> None:
+        """Build the PDF."""
+        with stage("pdf_finish"):
+            self.finish()
+
+    def begin(self) -> None:
+        """Start the document; in streaming mode this starts the build."""
+        if self.streaming:
+            self._start_streaming()
+
+    def add_front_matter(self, tree_content: str) -> None:
+        """Add the title page and repository structure.
+        
+        Args:
+            tree_content: Rendered directory tree of the repository
+        """
         # Add title
-        self.story.append(Paragraph(self.repo_name, self.title_style))
-        self.story.append(Spacer(1, 0.5 * inch))
-        self.story.append(PageBreak())
+        self._emit([
+            Paragraph(self.repo_name, self.title_style),
+            Spacer(1, 0.5 * inch),
+            PageBreak(),
+        ])
 
         # Add repository structure
-        print("Generating repository structure...")
-        self.story.append(Paragraph("Repository Structure", self.heading_style))
-        self.story.append(Spacer(1, 0.2 * inch))
-        tree_content = await get_file_tree(self.repo_path)
-        wrapped_tree = wrap_text(tree_content, 80)
-        self.story.append(Preformatted(wrapped_tree, self.code_style))
-        self.story.append(Spacer(1, 0.5 * inch))
-        self.story.append(PageBreak())
-
-        # Process files in batches
-        total_files = len(files_to_process)
-        with tqdm(total=total_files, desc="Processing files", unit="file") as pbar:
-            for i in range(0, total_files, BATCH_SIZE):
-                batch = files_to_process[i:i + BATCH_SIZE]
-                async for rel_path, content in self._process_batch(batch):
-                    self.story.append(PageBreak())
-                    self.story.append(Paragraph(f"File: {rel_path}", self.heading_style))
-                    self.story.append(Spacer(1, 0.2 * inch))
-                    wrapped_content = wrap_text(content, 80)
-                    self.story.append(Preformatted(wrapped_content, self.code_style))
-                    self.story.append(Spacer(1, 0.5 * inch))
-                    pbar.update(1)
-                
-                # Force garbage collection after each batch
-                gc.collect()
-
-        # Build PDF
-        self.doc.build(self.story)
-
-    async def _process_batch(self, files_batch: List[str]) -> Tuple[str, str]:
-        """Process a batch of files.
+        wrapped_tree = wrap_text(tree_content, CODE_WIDTH)
+        self._emit([
+            Paragraph("Repository Structure", self.heading_style),
+            Spacer(1, 0.2 * inch),
+            CodeBlock(wrapped_tree.split('\n'), self.code_style),
+            Spacer(1, 0.5 * inch),
+            PageBreak(),
+        ])
+
+    def add_file(self, rel_path: str, content: str, page_break: bool = True) -> None:
+        """Add a file section to the document.
         
         Args:
-            files_batch: List of files to process
-            
-        Yields:
-            Tuple of (relative_path, content) for each file
+            rel_path: Path of the file relative to the repository root
+            content: Cleaned and formatted file content
+            page_break: Start the section with a page break
         """
-        for file_path in files_batch:
+        if self.line_numbers:
+            lines, numbers = numbered_lines(content)
+        else:
+            lines, numbers = wrap_text(content, CODE_WIDTH).split('\n'), None
+        flowables = [PageBreak()] if page_break else []
+        flowables += [
+            FileBookmark(rel_path, self.file_pages),
+            Paragraph(f"File: {rel_path}", self.heading_style),
+            Spacer(1, 0.2 * inch),
+            CodeBlock(lines, self.code_style, numbers=numbers),
+            Spacer(1, 0.5 * inch),
+        ]
+        self._emit(flowables)
+
+    def finish(self) -> None:
+        """Finish laying out the document and write it to disk."""
+        if not self.streaming:
+            self.doc.build(self.story)
+            return
+        if self._building:
             try:
-                rel_path = os.path.relpath(file_path, self.repo_path)
-                
-                # Skip node_modules and other large directories
-                if 'node_modules' in rel_path or 'dist' in rel_path or 'build' in rel_path:
-                    yield rel_path, "[Directory skipped for performance]"
-                    continue
-                    
-                content = await self._read_file_content(file_path)
-                yield rel_path, content
-            except Exception as e:
-                print(f"\nError processing file {file_path}: {str(e)}")
-                yield os.path.relpath(file_path, self.repo_path), f"[Error processing file: {str(e)}]"
-
-    async def _read_file_content(self, file_path: str) -> str:
-        """Read and format file content.
+                self.doc._endBuild()
+            finally:
+                del self.doc.canv._doctemplate
+                self._building = False
+
+    def _start_streaming(self) -> None:
+        """Start a build that lays out flowables as they arrive.
+
+        Sets up the same page templates as SimpleDocTemplate.build, then
+        drives BaseDocTemplate's incremental build steps directly.
+        """
+        doc = self.doc
+        doc._calc()
+        frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='normal')
+        doc.addPageTemplates([
+            PageTemplate(id='First', frames=frame, pagesize=doc.pagesize),
+            PageTemplate(id='Later', frames=frame, pagesize=doc.pagesize),
+        ])
+        doc._startBuild(canvasmaker=StreamingCanvas)
+        doc.canv._doctemplate = doc
+        self._building = True
+
+    def _emit(self, flowables: List[Flowable]) -> None:
+        """Lay out flowables now when streaming, otherwise queue them in the story.
         
         Args:
-            file_path: Path to the file
-            
-        Returns:
-            Formatted file content
+            flowables: Flowables to add, in order
         """
-        from src.config.settings import MAX_FILE_SIZE, CHUNK_SIZE
-        
-        try:
-            # Skip large files
-            file_size = os.path.getsize(file_path)
-            if file_size > MAX_FILE_SIZE:
-                return f"[File too large to process: {file_size / (1024*1024):.1f}MB]"
-                
-            content = []
-            async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                while True:
-                    chunk = await f.read(CHUNK_SIZE)
-                    if not chunk:
-                        break
-                    content.append(chunk)
-            
-            content = ''.join(content)
-            content = content.replace('\t', '    ')
-            
-            # Remove block characters
-            block_chars = ['■', '▄', '▌', '█', '▐', '▖', '▗', '▘', '▙', '▚', '▛', '▜', '▝', '▞', '▟']
-            for ch in block_chars:
-                content = content.replace(ch, ' ')
-            
-            # Format code
-            file_extension = os.path.splitext(file_path)[1].lower()
-            formatted_content = await format_code(content, file_extension)
-            return formatted_content
-        except UnicodeDecodeError:
-            return "[Binary file content]"
-        except Exception as e:
-            return f"[Error reading file: {str(e)}]"
+        if not self.streaming:
+            self.story.extend(flowables)
+            return
+        doc = self.doc
+        while flowables:
+            doc.clean_hanging()
+            doc.handle_flowable(flowables)
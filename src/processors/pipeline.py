@@ -0,0 +1,61 @@
+from typing import List, Optional, Sequence, Tuple
+
+from src.config import settings
+from src.config.settings import DEDUP_FILES, MEMORY_CEILING
+from src.utils.repo_scanner import RepoIndex, scan_repository
+from src.processors.base import OutputSink
+from src.processors.ingest import iter_file_contents
+from src.processors.manifest import Manifest
+from src.utils.git_source import GitSource
+from src.utils.governor import ResourceGovernor
+
+class Pipeline:
+    """Single-pass pipeline that feeds every output sink from one ingest stage."""
+
+    def __init__(self, repo_path: str, sinks: Sequence[OutputSink], previous: Optional[Manifest] = None,
+                 source: Optional[GitSource] = None, progress: bool = True, dedup: bool = DEDUP_FILES,
+                 memory_ceiling: Optional[int] = MEMORY_CEILING):
+        self.repo_path = repo_path
+        self.sinks = list(sinks)
+        self.previous = previous
+        self.source = source  # Git revision to read instead of the working tree
+        self.progress = progress  # Show a progress bar
+        self.dedup = dedup  # Emit identical files as references to the first copy
+        self.memory_ceiling = memory_ceiling  # Bytes; None derives it from the host or container limit
+        self.governor: Optional[ResourceGovernor] = None
+        self.records: List[Tuple[str, int, int, Optional[str]]] = []
+        self.reused_files = 0
+        self.duplicate_files = 0
+
+    async def run(self, files_to_process: List[str], index: Optional[RepoIndex] = None) -> None:
+        """Read each file once and write it to all sinks.
+
+        Args:
+            files_to_process: List of files to process
+            index: Result of scanning the repository; scanned here if omitted
+        """
+        if index is None:
+            print("Generating repository structure...")
+            index = await scan_repository(self.repo_path)
+        for sink in self.sinks:
+            await sink.open(index.tree)
+
+        from tqdm import tqdm
+        self.governor = ResourceGovernor(self.memory_ceiling, settings.MAX_CONCURRENT_TASKS)
+        try:
+            total_files = len(files_to_process)
+            with tqdm(total=total_files, desc="Processing files", unit="file", disable=not self.progress) as pbar:
+                async for ingested in iter_file_contents(self.repo_path, files_to_process,
+                                                         self.previous, index.stats, self.source, self.dedup,
+                                                         self.governor):
+                    for sink in self.sinks:
+                        await sink.write_file(ingested.rel_path, ingested.content)
+                    self.records.append((ingested.rel_path, ingested.size, ingested.mtime_ns, ingested.digest))
+                    if ingested.reused:
+                        self.reused_files += 1
+                    if ingested.duplicate_of is not None:
+                        self.duplicate_files += 1
+                    pbar.update(1)
+        finally:
+            for sink in self.sinks:
+                await sink.close()
@@ -0,0 +1,158 @@
+import os
+import math
+import pickle
+import shutil
+import asyncio
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from src.config.settings import PDF_SHARDS, PDF_LINE_NUMBERS
+from src.utils.file_utils import os_path_basename, os_path_abspath
+from src.processors.base import OutputSink
+from src.processors.pdf_processor import PDFProcessor
+from src.utils.metrics import stage
+from src.utils.async_utils import shutdown_executor
+
+def _render_front_matter(repo_path: str, tree_content: str, part_path: str) -> List[Tuple[str, int]]:
+    """Render the title page and repository structure to a partial PDF."""
+    processor = PDFProcessor(repo_path, part_path, streaming=True)
+    processor.begin()
+    processor.add_front_matter(tree_content)
+    processor.finish()
+    return []
+
+def _render_shard(repo_path: str, spool_path: str, leading_break: bool, line_numbers: bool,
+                  part_path: str) -> List[Tuple[str, int]]:
+    """Render one shard of file sections to a partial PDF.
+
+    Args:
+        repo_path: Path to the repository
+        spool_path: Pickle stream of (rel_path, content) records
+        leading_break: Keep the page break before the shard's first file, as
+            the first shard does to match single-process pagination
+        line_numbers: Print source line numbers next to the code
+        part_path: Path of the partial PDF to write
+
+    Returns:
+        (rel_path, page index within the part) for each file
+    """
+    processor = PDFProcessor(repo_path, part_path, streaming=True, line_numbers=line_numbers)
+    processor.begin()
+    with open(spool_path, 'rb') as spool:
+        page_break = leading_break
+        while True:
+            try:
+                rel_path, content = pickle.load(spool)
+            except EOFError:
+                break
+            processor.add_file(rel_path, content, page_break=page_break)
+            page_break = True
+    processor.finish()
+    os.remove(spool_path)
+    return processor.file_pages
+
+class ShardedPDFProcessor(OutputSink):
+    """PDF output rendered in parallel by a process pool.
+
+    Files are spooled to disk in arrival order and split into ``shards``
+    contiguous shards. Each full shard is rendered to a partial PDF by a
+    worker process while ingest continues. The parts are then concatenated
+    into the final PDF with one outline entry per file.
+    """
+
+    def __init__(self, repo_path: str, output_pdf: str, total_files: int, shards: int = PDF_SHARDS,
+                 line_numbers: bool = PDF_LINE_NUMBERS):
+        self.repo_path = repo_path
+        self.output_pdf = output_pdf
+        self.repo_name = os_path_basename(os_path_abspath(repo_path))
+        self.shards = max(1, shards)
+        self.shard_size = max(1, math.ceil(total_files / self.shards))
+        self.line_numbers = line_numbers
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tmp_dir: Optional[str] = None
+        self._parts: List[Tuple[str, asyncio.Future]] = []
+        self._spool = None
+        self._spool_path: Optional[str] = None
+        self._spool_count = 0
+
+    async def open(self, tree_content: str) -> None:
+        """Start the worker pool and render the front matter.
+
+        Args:
+            tree_content: Rendered directory tree of the repository
+        """
+        self._tmp_dir = tempfile.mkdtemp(prefix="pdf_shards_", dir=os.path.dirname(os.path.abspath(self.output_pdf)))
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.shards,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self._submit(_render_front_matter, self.repo_path, tree_content)
+
+    async def write_file(self, rel_path: str, content: str) -> None:
+        """Spool a file section, submitting the shard once it is full.
+
+        Args:
+            rel_path: Path of the file relative to the repository root
+            content: Cleaned and formatted file content
+        """
+        with stage("pdf_spool"):
+            if self._spool is None:
+                self._spool_path = os.path.join(self._tmp_dir, f"shard{len(self._parts):04d}.pickle")
+                self._spool = open(self._spool_path, 'wb')
+                self._spool_count = 0
+            pickle.dump((rel_path, content), self._spool, protocol=pickle.HIGHEST_PROTOCOL)
+            self._spool_count += 1
+            if self._spool_count >= self.shard_size:
+                self._submit_spool()
+
+    async def close(self) -> None:
+        """Wait for all parts and concatenate them into the final PDF."""
+        try:
+            if self._spool is not None:
+                self._submit_spool()
+            with stage("pdf_render_wait"):
+                results = [await future for _, future in self._parts]
+            with stage("pdf_merge"):
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._merge, [path for path, _ in self._parts], results
+                )
+        finally:
+            if self._executor is not None:
+                shutdown_executor(self._executor)
+                self._executor = None
+            if self._tmp_dir is not None:
+                shutil.rmtree(self._tmp_dir, ignore_errors=True)
+                self._tmp_dir = None
+
+    def _submit(self, func, *args) -> None:
+        part_path = os.path.join(self._tmp_dir, f"part{len(self._parts):04d}.pdf")
+        future = asyncio.get_running_loop().run_in_executor(self._executor, func, *args, part_path)
+        self._parts.append((part_path, future))
+
+    def _submit_spool(self) -> None:
+        self._spool.close()
+        self._spool = None
+        self._submit(_render_shard, self.repo_path, self._spool_path, len(self._parts) == 1, self.line_numbers)
+
+    def _merge(self, part_paths: List[str], file_pages: List[List[Tuple[str, int]]]) -> None:
+        """Concatenate partial PDFs in order and rebuild the outline.
+
+        Args:
+            part_paths: Partial PDFs in document order
+            file_pages: Per part, (rel_path, page index within the part) for each file
+        """
+        from pypdf import PdfReader, PdfWriter
+
+        writer = PdfWriter()
+        offset = 0
+        for part_path, pages in zip(part_paths, file_pages):
+            reader = PdfReader(part_path)
+            writer.append(reader, import_outline=False)
+            for rel_path, page in pages:
+                writer.add_outline_item(rel_path, offset + page)
+            offset += len(reader.pages)
+        with open(self.output_pdf, 'wb') as f:
+            writer.write(f)
@@ -1,114 +1,140 @@
 import os
-from typing import List, Tuple
-import aiofiles
-from tqdm import tqdm
-import gc
+import json
+import hashlib
+from typing import Dict, List, Tuple
 
-from src.config.settings import BATCH_SIZE
-from src.utils.file_utils import os_path_join, os_path_basename, os_path_abspath, get_file_tree
-from src.formatters.code_formatter import format_code
+from src.config.settings import TXT_INDEX, TXT_SHARD_SIZE
+from src.utils.buffered_writer import BufferedWriter
+from src.utils.file_utils import os_path_basename, os_path_abspath
+from src.processors.base import OutputSink
+from src.processors.pipeline import Pipeline
+from src.utils.metrics import stage
 
-class TXTProcessor:
-    def __init__(self, repo_path: str, output_txt: str):
+INDEX_VERSION = 1
+
+def index_path_for(txt_path: str) -> str:
+    """Path of the index sidecar describing a TXT output."""
+    return os.path.splitext(txt_path)[0] + ".index.json"
+
+def shard_path_for(txt_path: str, shard: int) -> str:
+    """Path of one shard of a sharded TXT output, numbered from 1."""
+    stem, ext = os.path.splitext(txt_path)
+    return f"{stem}.{shard:03d}{ext}"
+
+class TXTProcessor(OutputSink):
+    """Writes the repository as one TXT file, or as size-bounded shards.
+
+    Next to each TXT file an index sidecar lists every file section with
+    its byte offset and length, a hash of the section and its line count,
+    so consumers can seek (or mmap and slice) straight to one file.
+    """
+
+    def __init__(self, repo_path: str, output_txt: str, shard_size: int = TXT_SHARD_SIZE,
+                 write_index: bool = TXT_INDEX):
         self.repo_path = repo_path
         self.output_txt = output_txt
+        self.shard_size = shard_size
+        self.write_index = write_index
         self.repo_name = os_path_basename(os_path_abspath(repo_path))
+        self._writer = None
+        self._index: List[dict] = []
+        self._part_files = 0
+        self._closed_bytes = 0
+        # Byte range (offset, length) of each file's content in its output file
+        self.sections: Dict[str, Tuple[int, int]] = {}
+        self.paths: List[str] = []  # TXT files written, one per shard
 
     async def process(self, files_to_process: List[str]) -> None:
         """Process files and generate TXT.
-        
+
         Args:
             files_to_process: List of files to process
         """
-        async with aiofiles.open(self.output_txt, 'w', encoding='utf-8') as f:
-            # Write header
-            await f.write(f"{self.repo_name}\n\n")
-            await f.write("Repository Structure\n")
-            await f.write("===================\n\n")
-            
-            # Add repository structure
-            print("Generating repository structure...")
-            tree_content = await get_file_tree(self.repo_path)
-            await f.write(tree_content)
-            await f.write("\n\n")
-            
-            # Process files in batches
-            total_files = len(files_to_process)
-            with tqdm(total=total_files, desc="Processing files", unit="file") as pbar:
-                for i in range(0, total_files, BATCH_SIZE):
-                    batch = files_to_process[i:i + BATCH_SIZE]
-                    async for rel_path, content in self._process_batch(batch):
-                        await f.write(f"\nFile: {rel_path}\n")
-                        await f.write("=" * (len(rel_path) + 6) + "\n\n")
-                        await f.write(content)
-                        await f.write("\n\n")
-                        pbar.update(1)
-                    
-                    # Force garbage collection after each batch
-                    gc.collect()
-
-    async def _process_batch(self, files_batch: List[str]) -> Tuple[str, str]:
-        """Process a batch of files.
-        
+        await Pipeline(self.repo_path, [self]).run(files_to_process)
+
+    async def open(self, tree_content: str) -> None:
+        """Open the output file and write the header and repository structure.
+
         Args:
-            files_batch: List of files to process
-            
-        Yields:
-            Tuple of (relative_path, content) for each file
+            tree_content: Rendered directory tree of the repository
         """
-        for file_path in files_batch:
-            try:
-                rel_path = os.path.relpath(file_path, self.repo_path)
-                
-                # Skip node_modules and other large directories
-                if 'node_modules' in rel_path or 'dist' in rel_path or 'build' in rel_path:
-                    yield rel_path, "[Directory skipped for performance]"
-                    continue
-                    
-                content = await self._read_file_content(file_path)
-                yield rel_path, content
-            except Exception as e:
-                print(f"\nError processing file {file_path}: {str(e)}")
-                yield os.path.relpath(file_path, self.repo_path), f"[Error processing file: {str(e)}]"
-
-    async def _read_file_content(self, file_path: str) -> str:
-        """Read and format file content.
-        
+        self.sections = {}
+        self.paths = []
+        self._closed_bytes = 0
+        self._start_part()
+
+        # Write header and repository structure
+        await self._writer.write(
+            f"{self.repo_name}\n\nRepository Structure\n===================\n\n{tree_content}\n\n".encode('utf-8')
+        )
+
+    async def write_file(self, rel_path: str, content: str) -> None:
+        """Write a file section.
+
         Args:
-            file_path: Path to the file
-            
-        Returns:
-            Formatted file content
+            rel_path: Path of the file relative to the repository root
+            content: Cleaned and formatted file content
         """
-        from src.config.settings import MAX_FILE_SIZE, CHUNK_SIZE
-        
-        try:
-            # Skip large files
-            file_size = os.path.getsize(file_path)
-            if file_size > MAX_FILE_SIZE:
-                return f"[File too large to process: {file_size / (1024*1024):.1f}MB]"
-                
-            content = []
-            async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                while True:
-                    chunk = await f.read(CHUNK_SIZE)
-                    if not chunk:
-                        break
-                    content.append(chunk)
-            
-            content = ''.join(content)
-            content = content.replace('\t', '    ')
-            
-            # Remove block characters
-            block_chars = ['■', '▄', '▌', '█', '▐', '▖', '▗', '▘', '▙', '▚', '▛', '▜', '▝', '▞', '▟']
-            for ch in block_chars:
-                content = content.replace(ch, ' ')
-            
-            # Format code
-            file_extension = os.path.splitext(file_path)[1].lower()
-            formatted_content = await format_code(content, file_extension)
-            return formatted_content
-        except UnicodeDecodeError:
-            return "[Binary file content]"
-        except Exception as e:
-            return f"[Error reading file: {str(e)}]"
+        with stage("txt_write"):
+            header = f"\nFile: {rel_path}\n{'=' * (len(rel_path) + 6)}\n\n".encode('utf-8')
+            body = content.encode('utf-8')
+            size = len(header) + len(body) + 2
+            # Start a new shard unless this one is empty; a file larger than
+            # the limit gets a shard of its own
+            if self.shard_size and self._part_files and self._writer.offset + size > self.shard_size:
+                await self._finish_part()
+                self._start_part()
+            offset = self._writer.offset + len(header)
+            self.sections[rel_path] = (offset, len(body))
+            if self.write_index:
+                self._index.append({
+                    "path": rel_path,
+                    "offset": offset,
+                    "length": len(body),
+                    "hash": hashlib.blake2b(body, digest_size=16).hexdigest(),
+                    "lines": body.count(b"\n") + (1 if body and not body.endswith(b"\n") else 0),
+                })
+            self._part_files += 1
+            await self._writer.write(header, body, b"\n\n")
+
+    @property
+    def bytes_written(self) -> int:
+        """Size of the TXT output so far, across all shards."""
+        return self._closed_bytes + (self._writer.offset if self._writer is not None else 0)
+
+    async def close(self) -> None:
+        """Flush and close the output file."""
+        if self._writer is not None:
+            with stage("txt_flush"):
+                await self._finish_part()
+
+    def _start_part(self) -> None:
+        path = shard_path_for(self.output_txt, len(self.paths) + 1) if self.shard_size else self.output_txt
+        self.paths.append(path)
+        self._index = []
+        self._part_files = 0
+        self._writer = BufferedWriter(path)
+        self._writer.open()
+
+    async def _finish_part(self) -> None:
+        """Close the current output file and write its index."""
+        writer, self._writer = self._writer, None
+        await writer.close()
+        self._closed_bytes += writer.offset
+        if self.write_index:
+            self._save_index(writer.path, writer.offset)
+
+    def _save_index(self, txt_path: str, txt_size: int) -> None:
+        data = {
+            "version": INDEX_VERSION,
+            "txt": os.path.basename(txt_path),
+            "txt_size": txt_size,
+            "shard": len(self.paths) if self.shard_size else None,
+            "hash": "blake2b-128",  # Digest of each section's bytes
+            "files": self._index,
+        }
+        index_path = index_path_for(txt_path)
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, index_path)
@@ -0,0 +1,321 @@
+"""Long-running conversion server.
+
+Keeps the formatter pools and caches warm across jobs. Jobs are submitted
+as JSON over HTTP, either on a local TCP port or on a Unix socket:
+
+    python -m src.server --port 8765
+    curl -s localhost:8765/jobs -d '{"repo_path": "/path/to/repo", "options": {"incremental": true}}'
+    curl -s localhost:8765/jobs/1
+"""
+import os
+import json
+import time
+import signal
+import asyncio
+import argparse
+import itertools
+import traceback
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from src.config.settings import FORMAT_CACHE_FILE, OUTPUT_DIR, SERVER_MAX_JOBS, SERVER_PORT, SERVER_HISTORY
+from src.main import build_parser, convert, parse_args
+from src.formatters.code_formatter import configure_format_cache, format_code, shutdown_formatters, start_formatters
+from src.utils.file_utils import os_path_abspath, os_path_basename
+
+# Job options accepted over the API, mapped to their command line flags
+JOB_OPTIONS = ("output_dir", "format", "no_gitignore", "no_dedup", "pdf_shards", "line_numbers", "txt_shard_mb", "max_memory", "git_rev", "incremental")
+MAX_REQUEST_SIZE = 1024 * 1024
+
+class Job:
+    """One conversion request and its status."""
+
+    def __init__(self, job_id: int, client: str, args: argparse.Namespace):
+        self.id = job_id
+        self.client = client
+        self.args = args
+        self.state = "queued"  # queued, running, done or failed
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.log: List[str] = []
+
+    @property
+    def output_key(self) -> Tuple[str, str]:
+        """Jobs writing the same output files must not run at the same time."""
+        return (os_path_abspath(self.args.output_dir), os_path_basename(os_path_abspath(self.args.repo_path)))
+
+    def to_dict(self, with_log: bool = False) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "client": self.client,
+            "repo_path": self.args.repo_path,
+            "state": self.state,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "result": self.result,
+            "error": self.error,
+        }
+        if with_log:
+            data["log"] = self.log
+        return data
+
+class Scheduler:
+    """Runs jobs with a global concurrency cap and fair scheduling.
+
+    Each client has its own queue and free slots are handed out round-robin
+    across clients, so one client submitting hundreds of repositories does
+    not starve the others.
+    """
+
+    def __init__(self, max_jobs: int = SERVER_MAX_JOBS, history: int = SERVER_HISTORY):
+        self.max_jobs = max(1, max_jobs)
+        self.history = history
+        self.jobs: "OrderedDict[int, Job]" = OrderedDict()
+        self._queues: "OrderedDict[str, Deque[Job]]" = OrderedDict()
+        self._running: Dict[int, asyncio.Task] = {}
+        self._busy_outputs = set()
+        self._ids = itertools.count(1)
+
+    def submit(self, client: str, args: argparse.Namespace) -> Job:
+        job = Job(next(self._ids), client, args)
+        self.jobs[job.id] = job
+        self._queues.setdefault(client, deque()).append(job)
+        self._dispatch()
+        return job
+
+    def _next_job(self) -> Optional[Job]:
+        """Take the first runnable job, rotating through clients."""
+        for _ in range(len(self._queues)):
+            client, queue = next(iter(self._queues.items()))
+            self._queues.move_to_end(client)
+            for job in queue:
+                if job.output_key not in self._busy_outputs:
+                    queue.remove(job)
+                    if not queue:
+                        del self._queues[client]
+                    return job
+        return None
+
+    def _dispatch(self) -> None:
+        while len(self._running) < self.max_jobs:
+            job = self._next_job()
+            if job is None:
+                return
+            self._busy_outputs.add(job.output_key)
+            self._running[job.id] = asyncio.ensure_future(self._run(job))
+
+    async def _run(self, job: Job) -> None:
+        job.state = "running"
+        job.started = time.time()
+        try:
+            job.result = await convert(job.args, log=job.log.append, progress=False)
+            job.state = "done"
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            job.state = "failed"
+        finally:
+            job.finished = time.time()
+            self._busy_outputs.discard(job.output_key)
+            del self._running[job.id]
+            self._prune()
+            self._dispatch()
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond the history limit."""
+        finished = [job_id for job_id, job in self.jobs.items() if job.state in ("done", "failed")]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+
+    def status(self) -> Dict[str, Any]:
+        states = [job.state for job in self.jobs.values()]
+        return {
+            "max_jobs": self.max_jobs,
+            "running": states.count("running"),
+            "queued": states.count("queued"),
+            "format_memory_cache": format_code.cache_info()._asdict(),
+        }
+
+    async def drain(self) -> None:
+        """Wait for running jobs; queued jobs are dropped."""
+        self._queues.clear()
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+def job_args(body: Dict[str, Any]) -> argparse.Namespace:
+    """Build conversion options from a job request.
+
+    Args:
+        body: {"repo_path": ..., "options": {...}} as sent by the client
+
+    Returns:
+        Options in the form convert() expects
+
+    Raises:
+        ValueError: If the request is malformed
+    """
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be a JSON object")
+    repo_path = body.get("repo_path")
+    if not isinstance(repo_path, str) or not repo_path:
+        raise ValueError("repo_path is required")
+    options = body.get("options") or {}
+    if not isinstance(options, dict):
+        raise ValueError("options must be a JSON object")
+    unknown = set(options) - set(JOB_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unsupported options: {', '.join(sorted(unknown))}")
+    parser = build_parser(_RequestParser, add_help=False)
+    flags = {action.dest: action for action in parser._actions}
+    argv: List[str] = []
+    for name, value in options.items():
+        action = flags[name]
+        flag = action.option_strings[0]
+        if action.nargs == 0:
+            if not isinstance(value, bool):
+                raise ValueError(f"{name} must be true or false")
+            if value:
+                argv.append(flag)
+        elif value is not None:
+            if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+                raise ValueError(f"{name} must be a string or a number")
+            argv += [flag, str(value)]
+    # Everything after "--" is positional, so a repo_path like "-h" is not read as a flag
+    return parse_args(argv + ["--", repo_path], parser)
+
+class _RequestParser(argparse.ArgumentParser):
+    """Argument parser that reports problems as ValueError instead of exiting."""
+
+    def error(self, message: str):
+        raise ValueError(message)
+
+    def exit(self, status: int = 0, message: Optional[str] = None):
+        raise ValueError((message or "Invalid options").strip())
+
+class Server:
+    """Minimal HTTP/1.1 front end for the scheduler."""
+
+    def __init__(self, scheduler: Scheduler):
+        self.scheduler = scheduler
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            status, payload = await self._respond(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as e:
+            traceback.print_exc()
+            status, payload = "500 Internal Server Error", {"error": str(e) or type(e).__name__}
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii") + body
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _respond(self, reader: asyncio.StreamReader) -> Tuple[str, Any]:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if len(request_line) < 2:
+            return "400 Bad Request", {"error": "Malformed request"}
+        method, path = request_line[0], request_line[1].rstrip("/")
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            return "400 Bad Request", {"error": "Invalid Content-Length"}
+        if length > MAX_REQUEST_SIZE:
+            return "413 Payload Too Large", {"error": "Request too large"}
+        raw = await reader.readexactly(length) if length else b""
+
+        if path == "/health" and method == "GET":
+            return "200 OK", self.scheduler.status()
+        if path == "/jobs" and method == "GET":
+            return "200 OK", [job.to_dict() for job in self.scheduler.jobs.values()]
+        if path == "/jobs" and method == "POST":
+            try:
+                body = json.loads(raw or b"{}")
+                args = job_args(body)
+            except ValueError as e:
+                return "400 Bad Request", {"error": str(e)}
+            job = self.scheduler.submit(str(body.get("client") or "default"), args)
+            return "202 Accepted", job.to_dict()
+        if path.startswith("/jobs/") and method == "GET":
+            job_id = path[len("/jobs/"):]
+            job = self.scheduler.jobs.get(int(job_id)) if job_id.isdigit() else None
+            if job is None:
+                return "404 Not Found", {"error": f"No job {job_id}"}
+            return "200 OK", job.to_dict(with_log=True)
+        return "404 Not Found", {"error": f"No route for {method} {path}"}
+
+async def warm_up() -> None:
+    """Start the formatter pools before the first job arrives.
+
+    The pools are started directly rather than by formatting a sample,
+    which the persistent cache would answer without starting them.
+    """
+    await start_formatters()
+
+async def serve(args: argparse.Namespace) -> None:
+    configure_format_cache(None if args.no_cache else args.cache_path)
+    scheduler = Scheduler(args.max_jobs)
+    server = Server(scheduler)
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        listener = await asyncio.start_unix_server(server.handle, path=args.socket)
+        where = args.socket
+    else:
+        listener = await asyncio.start_server(server.handle, host=args.host, port=args.port)
+        where = f"http://{args.host}:{args.port}"
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    try:
+        await warm_up()
+        print(f"Listening on {where} (up to {scheduler.max_jobs} concurrent jobs)")
+        await stop.wait()
+        print("Shutting down, waiting for running jobs...")
+    finally:
+        listener.close()
+        await listener.wait_closed()
+        await scheduler.drain()
+        await shutdown_formatters()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.server", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="Port to listen on (default: %(default)s)")
+    parser.add_argument("--socket", default=None, help="Listen on this Unix socket instead of a TCP port")
+    parser.add_argument("--max-jobs", type=int, default=SERVER_MAX_JOBS,
+                        help="Jobs converted at the same time (default: %(default)s)")
+    parser.add_argument("--cache-path", default=os.path.join(OUTPUT_DIR, FORMAT_CACHE_FILE),
+                        help="Location of the persistent formatting cache (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the persistent formatting cache")
+    asyncio.run(serve(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
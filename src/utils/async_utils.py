@@ -1,26 +1,209 @@
+import sys
+import asyncio
+import hashlib
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import Executor
 from functools import wraps
-from typing import Any, Callable, TypeVar, cast
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, TypeVar, cast
+
+if TYPE_CHECKING:
+    from src.utils.governor import ResourceGovernor
 
 T = TypeVar('T')
+R = TypeVar('R')
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize', 'maxbytes', 'currbytes'])
 
-def async_lru_cache(maxsize: int = 128, typed: bool = False) -> Callable:
+def _hash_key(args: tuple, kwargs: dict, typed: bool) -> str:
+    """Build a fixed-size cache key from call arguments.
+
+    Strings and bytes are hashed by content so large file bodies are never
+    kept as dictionary keys.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    items = list(args) + [item for pair in sorted(kwargs.items()) for item in pair]
+    for item in items:
+        if isinstance(item, str):
+            data = item.encode('utf-8', 'surrogatepass')
+        elif isinstance(item, (bytes, bytearray)):
+            data = bytes(item)
+        else:
+            data = repr(item).encode()
+        if typed:
+            digest.update(type(item).__qualname__.encode())
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+    return digest.hexdigest()
+
+def _size_of(value: Any) -> int:
+    """Approximate memory held by a cached value."""
+    if isinstance(value, str):
+        return len(value)
+    return sys.getsizeof(value)
+
+def async_lru_cache(maxsize: Optional[int] = 128, typed: bool = False, maxbytes: Optional[int] = None,
+                    on_hit: Optional[Callable[[], None]] = None) -> Callable:
     """Async LRU cache decorator.
-    
+
+    Keys are hashes of the arguments, entries are evicted least recently
+    used first once either limit is exceeded, and concurrent calls with the
+    same arguments share a single in-flight computation.
+
     Args:
-        maxsize: Maximum size of the cache
+        maxsize: Maximum number of entries, or None for no limit
         typed: If True, arguments of different types will be cached separately
-        
+        maxbytes: Maximum total size of cached values, or None for no limit
+        on_hit: Called in the caller's context whenever a call is served from
+            the cache or shares an in-flight computation
+
     Returns:
-        Decorated async function with caching
+        Decorated async function with caching, exposing cache_info() and
+        cache_clear()
     """
-    cache = {}
-    
     def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        cache: 'OrderedDict[str, Any]' = OrderedDict()
+        sizes: Dict[str, int] = {}
+        in_flight: Dict[str, asyncio.Future] = {}
+        stats = {'hits': 0, 'misses': 0, 'bytes': 0}
+
+        def evict() -> None:
+            while cache and (
+                (maxsize is not None and len(cache) > maxsize)
+                or (maxbytes is not None and stats['bytes'] > maxbytes)
+            ):
+                key, _ = cache.popitem(last=False)
+                stats['bytes'] -= sizes.pop(key)
+
         @wraps(func)
         async def wrapper(*args: Any, **kwargs: Any) -> Any:
-            key = str(args) + str(kwargs)
-            if key not in cache:
-                cache[key] = await func(*args, **kwargs)
-            return cache[key]
+            key = _hash_key(args, kwargs, typed)
+            if key in cache:
+                stats['hits'] += 1
+                cache.move_to_end(key)
+                if on_hit is not None:
+                    on_hit()
+                return cache[key]
+
+            pending = in_flight.get(key)
+            if pending is not None:
+                stats['hits'] += 1
+                if on_hit is not None:
+                    on_hit()
+                return await asyncio.shield(pending)
+
+            stats['misses'] += 1
+            future = asyncio.get_running_loop().create_future()
+            in_flight[key] = future
+            try:
+                result = await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                # Mark the exception as retrieved when nobody else was waiting
+                future.exception()
+                raise
+            finally:
+                in_flight.pop(key, None)
+
+            future.set_result(result)
+            if maxsize != 0:
+                size = _size_of(result)
+                if maxbytes is None or size <= maxbytes:
+                    cache[key] = result
+                    sizes[key] = size
+                    stats['bytes'] += size
+                    evict()
+            return result
+
+        def cache_info() -> CacheInfo:
+            return CacheInfo(stats['hits'], stats['misses'], maxsize, len(cache), maxbytes, stats['bytes'])
+
+        def cache_clear() -> None:
+            cache.clear()
+            sizes.clear()
+            stats.update(hits=0, misses=0, bytes=0)
+
+        wrapper.cache_info = cache_info  # type: ignore[attr-defined]
+        wrapper.cache_clear = cache_clear  # type: ignore[attr-defined]
         return cast(Callable[..., Any], wrapper)
     return decorator
+
+async def ordered_prefetch(items: Iterable[T], func: Callable[[T], Awaitable[R]], max_tasks: int,
+                           max_bytes: Optional[int] = None,
+                           size_of: Optional[Callable[[T], int]] = None,
+                           governor: Optional["ResourceGovernor"] = None) -> AsyncIterator[R]:
+    """Run ``func`` over items concurrently and yield results in input order.
+
+    Work is started ahead of the consumer in a window holding at most
+    ``max_tasks`` items and, when ``max_bytes`` is given, at most that many
+    estimated bytes. Finished results count against the window until they
+    are yielded, so a slow item at the head keeps memory bounded. A single
+    item larger than ``max_bytes`` is still processed on its own. With a
+    governor, its current limits replace ``max_tasks`` and ``max_bytes`` each
+    time the window is refilled and it is told the bytes held after each
+    result.
+
+    Args:
+        items: Items to process
+        func: Coroutine function applied to each item
+        max_tasks: Maximum number of items started but not yet yielded
+        max_bytes: Maximum estimated size of those items, or None for no limit
+        size_of: Estimated size of an item, required with max_bytes or governor
+        governor: ResourceGovernor adjusting the limits while running
+
+    Yields:
+        func(item) for each item, in input order
+    """
+    max_tasks = max(1, max_tasks)
+    window: 'deque[tuple[asyncio.Task, int]]' = deque()
+    window_bytes = 0
+    iterator = iter(items)
+    held = None  # Next item, waiting for room in the window
+    exhausted = False
+    try:
+        while True:
+            if governor is not None:
+                max_tasks, max_bytes = governor.max_tasks, governor.max_bytes
+            while not exhausted and len(window) < max_tasks:
+                if held is None:
+                    try:
+                        held = (next(iterator),)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                size = size_of(held[0]) if max_bytes is not None else 0
+                if max_bytes is not None and window and window_bytes + size > max_bytes:
+                    break
+                window.append((asyncio.ensure_future(func(held[0])), size))
+                window_bytes += size
+                held = None
+            if not window:
+                return
+            task, size = window.popleft()
+            result = await task
+            window_bytes -= size
+            if governor is not None:
+                governor.observe(window_bytes)
+            yield result
+    finally:
+        for task, _ in window:
+            task.cancel()
+
+def shutdown_executor(executor: Executor, wait: bool = True) -> None:
+    """Shut down an executor, cancelling calls that have not started.
+
+    shutdown(cancel_futures=True) only exists from Python 3.9; before that
+    the pending futures of a process pool are cancelled here first.
+
+    Args:
+        executor: Executor to shut down
+        wait: Wait for running calls to finish
+    """
+    if sys.version_info >= (3, 9):
+        executor.shutdown(wait=wait, cancel_futures=True)
+        return
+    for item in list(getattr(executor, "_pending_work_items", {}).values()):
+        item.future.cancel()
+    executor.shutdown(wait=wait)
@@ -0,0 +1,73 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from src.config.settings import OUTPUT_BUFFER_SIZE, OUTPUT_WRITER_THREAD
+
+class BufferedWriter:
+    """Append-only binary file written in large batches.
+
+    Encoded segments are collected in memory and written with a single
+    blocking ``writelines`` call once ``buffer_size`` bytes are pending.
+    With ``threaded`` the write runs on a dedicated writer thread while the
+    next batch is filled; at most one batch is in flight at a time.
+    """
+
+    def __init__(self, path: str, buffer_size: int = OUTPUT_BUFFER_SIZE, threaded: bool = OUTPUT_WRITER_THREAD):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.threaded = threaded
+        self.offset = 0  # Bytes written so far, including buffered ones
+        self._file = None
+        self._chunks: List[bytes] = []
+        self._pending = 0
+        self._thread: Optional[ThreadPoolExecutor] = None
+        self._in_flight: Optional[asyncio.Future] = None
+
+    def open(self) -> None:
+        """Create or truncate the file."""
+        self._file = open(self.path, 'wb')
+        self.offset = 0
+        if self.threaded:
+            self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="output-writer")
+
+    async def write(self, *segments: bytes) -> None:
+        """Append encoded segments, flushing when the buffer is full.
+
+        Args:
+            segments: Bytes to append, in order
+        """
+        for segment in segments:
+            self._chunks.append(segment)
+            self._pending += len(segment)
+            self.offset += len(segment)
+        if self._pending >= self.buffer_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Hand the buffered segments to the file."""
+        if not self._chunks:
+            return
+        chunks, self._chunks, self._pending = self._chunks, [], 0
+        if self._thread is None:
+            self._file.writelines(chunks)
+            return
+        if self._in_flight is not None:
+            await self._in_flight
+        self._in_flight = asyncio.get_running_loop().run_in_executor(self._thread, self._file.writelines, chunks)
+
+    async def close(self) -> None:
+        """Write any remaining data and close the file."""
+        try:
+            if self._file is not None:
+                await self.flush()
+                if self._in_flight is not None:
+                    await self._in_flight
+        finally:
+            self._in_flight = None
+            if self._thread is not None:
+                self._thread.shutdown(wait=True)
+                self._thread = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
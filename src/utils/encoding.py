@@ -0,0 +1,96 @@
+import codecs
+from typing import Optional
+
+# Byte order marks, longest first so UTF-32 LE is not mistaken for UTF-16 LE
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Signatures of common binary formats. Formats whose headers contain NUL
+# bytes (executables, fonts, ...) are caught by the NUL check anyway; these
+# cover the ones that may not have a NUL in the first few KB.
+MAGIC_NUMBERS = (
+    b'\x89PNG\r\n\x1a\n', b'GIF87a', b'GIF89a', b'\xff\xd8\xff', b'II*\x00', b'MM\x00*',
+    b'wOFF', b'wOF2', b'%PDF-', b'PK\x03\x04', b'PK\x05\x06', b'\x1f\x8b', b'BZh91',
+    b'\xfd7zXZ\x00', b'7z\xbc\xaf\x27\x1c', b'Rar!\x1a\x07', b'\x7fELF', b'\xca\xfe\xba\xbe',
+    b'\xcf\xfa\xed\xfe', b'\xce\xfa\xed\xfe', b'\x00asm', b'SQLite format 3\x00',
+    b'OggS', b'fLaC', b'\x1aE\xdf\xa3',
+)
+
+# Control characters that commonly appear in text files
+_TEXT_CONTROLS = b'\t\n\r\f\b\x1b'
+_CONTROL_CHARS = bytes(c for c in range(32) if c not in _TEXT_CONTROLS) + b'\x7f'
+
+MAX_CONTROL_RATIO = 0.1  # Share of control bytes above which a file is treated as binary
+
+def sniff_encoding(prefix: bytes) -> Optional[str]:
+    """Classify a file from the first bytes of its content.
+
+    Args:
+        prefix: The first few KB of the file
+
+    Returns:
+        The encoding to decode the file with, or None if it is binary
+    """
+    if not prefix:
+        return 'utf-8'
+
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding
+
+    if prefix.startswith(MAGIC_NUMBERS):
+        return None
+
+    if b'\x00' in prefix:
+        return _sniff_utf16(prefix)
+
+    control = len(prefix) - len(prefix.translate(None, _CONTROL_CHARS))
+    if control / len(prefix) > MAX_CONTROL_RATIO:
+        return None
+
+    # The prefix may end in the middle of a multi-byte sequence
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+def _sniff_utf16(prefix: bytes) -> Optional[str]:
+    """Recognize BOM-less UTF-16 by its alternating NUL bytes."""
+    sample = prefix[:len(prefix) & ~1]
+    if len(sample) < 4:
+        return None
+    even_nuls = sample[0::2].count(0)
+    odd_nuls = sample[1::2].count(0)
+    half = len(sample) // 2
+    if odd_nuls > 0.9 * half and even_nuls < 0.1 * half:
+        return 'utf-16-le'
+    if even_nuls > 0.9 * half and odd_nuls < 0.1 * half:
+        return 'utf-16-be'
+    return None
+
+def decode_text(data: bytes, encoding: str) -> str:
+    """Decode file content with universal newlines.
+
+    UTF-8 that turns out to be invalid past the sniffed prefix falls back
+    to Latin-1, which never fails.
+
+    Args:
+        data: Raw file content
+        encoding: Encoding returned by sniff_encoding
+
+    Returns:
+        Decoded text with ``\\r\\n`` and ``\\r`` line endings turned into ``\\n``
+    """
+    try:
+        text = data.decode(encoding)
+    except UnicodeDecodeError:
+        text = data.decode('latin-1')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
@@ -0,0 +1,121 @@
+import mmap
+from typing import Optional, Tuple
+from aiofiles.os import wrap
+
+from src.config.settings import (
+    SNIFF_SIZE, CHUNK_SIZE, EXCERPT_HEAD_LINES, EXCERPT_TAIL_LINES, EXCERPT_MAX_BYTES, EXCERPT_COUNT_LIMIT,
+)
+from src.utils.encoding import sniff_encoding, decode_text
+
+# Encodings in which b"\n" always is a line break and never part of a character
+_BYTE_LINE_ENCODINGS = ('utf-8', 'utf-8-sig', 'latin-1')
+
+def _head_end(data, size: int, lines: int, max_bytes: int) -> int:
+    """Offset just past the first `lines` lines, at most max_bytes in."""
+    limit = min(size, max_bytes)
+    pos = 0
+    for _ in range(lines):
+        newline = data.find(b"\n", pos, limit)
+        if newline < 0:
+            return limit
+        pos = newline + 1
+    return pos
+
+def _tail_start(data, size: int, lines: int, max_bytes: int, floor: int) -> int:
+    """Offset where the last `lines` lines start, at most max_bytes from the end."""
+    if lines <= 0:
+        return size
+    limit = max(floor, size - max_bytes)
+    # A final newline ends the last line rather than starting an empty one
+    pos = size - 1 if data[size - 1:size] == b"\n" else size
+    for _ in range(lines):
+        newline = data.rfind(b"\n", limit, pos)
+        if newline < 0:
+            return limit
+        pos = newline
+    return pos + 1
+
+def _char_start(data, pos: int, size: int) -> int:
+    """Move pos forward past UTF-8 continuation bytes."""
+    for _ in range(3):
+        if pos >= size or data[pos] & 0xC0 != 0x80:
+            break
+        pos += 1
+    return pos
+
+def _count_lines(data, start: int, end: int) -> int:
+    """Count newlines in data[start:end] a chunk at a time."""
+    count = 0
+    for pos in range(start, end, CHUNK_SIZE):
+        count += data[pos:min(end, pos + CHUNK_SIZE)].count(b"\n")
+    return count
+
+def _omitted_lines(data, size: int, head_end: int, tail_start: int) -> Optional[str]:
+    """Describe the lines between head_end and tail_start.
+
+    Up to EXCERPT_COUNT_LIMIT bytes are counted exactly; past that the
+    count is estimated from the line density of the kept head and tail, so
+    excerpting never reads more of the file than it keeps. None when the
+    head and tail hold no line breaks to estimate from.
+    """
+    if tail_start - head_end <= EXCERPT_COUNT_LIMIT:
+        return f"{_count_lines(data, head_end, tail_start):,}"
+    kept = head_end + size - tail_start
+    newlines = _count_lines(data, 0, head_end) + _count_lines(data, tail_start, size)
+    if not newlines:
+        return None
+    return f"~{round((tail_start - head_end) * newlines / kept):,}"
+
+def excerpt_text(data, size: int, encoding: str, head_lines: int = EXCERPT_HEAD_LINES,
+                 tail_lines: int = EXCERPT_TAIL_LINES, max_bytes: int = EXCERPT_MAX_BYTES) -> str:
+    """Keep the head and tail of a large text buffer and describe the rest.
+
+    Only the kept ranges are copied out of data, which may be an mmap.
+
+    Args:
+        data: File content; bytes or a memory map
+        size: Length of data
+        encoding: Encoding returned by sniff_encoding
+        head_lines: Lines kept from the start
+        tail_lines: Lines kept from the end
+        max_bytes: Cap on each of the head and tail
+
+    Returns:
+        Decoded head, a marker for the elided middle, and decoded tail
+    """
+    head_end = _char_start(data, _head_end(data, size, head_lines, max_bytes), size)
+    tail_start = _char_start(data, _tail_start(data, size, tail_lines, max_bytes, head_end), size)
+    if tail_start <= head_end:
+        return decode_text(data[:size], encoding)
+
+    head = decode_text(data[:head_end], encoding)
+    tail = decode_text(data[tail_start:size], encoding)
+    omitted = tail_start - head_end
+    lines = _omitted_lines(data, size, head_end, tail_start)
+    counted = f", {lines} lines" if lines is not None else ""
+    marker = f"[... {omitted:,} bytes{counted} omitted from a {size / (1024 * 1024):.1f}MB file ...]"
+    if head and not head.endswith("\n"):
+        head += "\n"
+    return f"{head}\n{marker}\n\n{tail}"
+
+def _read_excerpt(file_path: str) -> Tuple[Optional[str], Optional[str]]:
+    """Excerpt an oversized file through a read-only memory map.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        (encoding, excerpt); encoding is None when the file is binary, and
+        the excerpt is None when the encoding has no byte-level line breaks
+    """
+    with open(file_path, 'rb') as f:
+        size = f.seek(0, 2)
+        if size == 0:
+            return 'utf-8', ''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            encoding = sniff_encoding(data[:SNIFF_SIZE])
+            if encoding not in _BYTE_LINE_ENCODINGS:
+                return encoding, None
+            return encoding, excerpt_text(data, size, encoding)
+
+read_excerpt = wrap(_read_excerpt)
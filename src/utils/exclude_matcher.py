@@ -0,0 +1,239 @@
+import os
+import re
+import fnmatch
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+IGNORE_FILES = (".gitignore", ".ignore")
+
+def _combine(patterns: Iterable[str]) -> Optional[Pattern]:
+    """Compile fnmatch patterns into one regex, or None when there are none."""
+    translated = [fnmatch.translate(pattern) for pattern in patterns]
+    if not translated:
+        return None
+    return re.compile("|".join(f"(?:{regex})" for regex in translated))
+
+class ExcludeMatcher:
+    """Precompiled form of EXCLUDE_PATTERNS.
+
+    Patterns ending in ``/`` name directories and prune the walk before it
+    descends; the other patterns are matched against entry names and
+    against file paths relative to the repository root, exactly as
+    fnmatch would.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        patterns = tuple(dict.fromkeys(patterns))
+        dir_patterns = [p.rstrip("/") for p in patterns if p.endswith("/")]
+        name_patterns = [p for p in patterns if not p.endswith("/")]
+        self._dir_re = _combine(dir_patterns + name_patterns)
+        self._name_re = _combine(name_patterns)
+
+    def excludes_dir(self, name: str) -> bool:
+        """Return True if a directory with this name should not be entered."""
+        return self._dir_re is not None and self._dir_re.match(name) is not None
+
+    def excludes_name(self, name: str) -> bool:
+        """Return True if a file with this name is hidden from the tree."""
+        return self._name_re is not None and self._name_re.match(name) is not None
+
+    def excludes_path(self, rel_path: str) -> bool:
+        """Return True if a file should not be processed, given its relative path."""
+        return self._name_re is not None and self._name_re.match(rel_path) is not None
+
+def _class_end(pattern: str, start: int) -> int:
+    """Index of the "]" closing the class opened at start, or -1.
+
+    A "]" right after the opening "[" (or "[!") belongs to the class, and
+    a backslash escapes the character after it.
+    """
+    i, n = start + 1, len(pattern)
+    if pattern[i:i + 1] in ("!", "^"):
+        i += 1
+    if pattern[i:i + 1] == "]":
+        i += 1
+    while i < n and pattern[i] != "]":
+        i += 2 if pattern[i] == "\\" else 1
+    return i if i < n else -1
+
+def _translate_class(body: str) -> str:
+    """Translate the inside of a gitignore [...] class into a regex class."""
+    out = []
+    i, n = 0, len(body)
+    if body[:1] in ("!", "^"):
+        out.append("^/")  # A class never matches "/"
+        i = 1
+    first = i
+    while i < n:
+        c = body[i]
+        if c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(body[i]))
+        elif c == "-" and first < i < n - 1:
+            out.append(c)
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "[" + "".join(out) + "]"
+
+def _translate_gitignore(pattern: str) -> str:
+    """Translate a gitignore glob into a regex body.
+
+    ``*`` and ``?`` never match ``/``; ``**`` matches across directories
+    when it forms a whole path component.
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern[i:i + 2] == "**" and (i == 0 or pattern[i - 1] == "/") and (i + 2 == n or pattern[i + 2] == "/"):
+                if i + 2 == n:
+                    out.append(".*")
+                    i += 2
+                else:
+                    out.append("(?:.*/)?")
+                    i += 3
+                continue
+            while i < n and pattern[i] == "*":
+                i += 1
+            out.append("[^/]*")
+            continue
+        if c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = _class_end(pattern, i)
+            if end == -1:
+                # Empty or unterminated classes are matched literally
+                out.append(re.escape(c))
+            else:
+                out.append(_translate_class(pattern[i + 1:end]))
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+class IgnoreRule:
+    """One line of a .gitignore file."""
+
+    __slots__ = ("regex", "negate", "dir_only", "anchored")
+
+    def __init__(self, regex: Pattern, negate: bool, dir_only: bool, anchored: bool):
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+        self.anchored = anchored
+
+def parse_ignore_lines(lines: Iterable[str]) -> List[IgnoreRule]:
+    """Parse gitignore syntax into rules.
+
+    Args:
+        lines: Lines of a .gitignore or .ignore file
+
+    Returns:
+        Rules in file order
+    """
+    rules = []
+    for line in lines:
+        line = line.rstrip("\n").rstrip("\r")
+        if not line or line.startswith("#"):
+            continue
+        # Trailing spaces are ignored unless escaped
+        stripped = line.rstrip(" ")
+        if stripped.endswith("\\") and len(stripped) < len(line):
+            stripped += " "
+        line = stripped
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\!") or line.startswith("\\#"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        line = line.lstrip("/")
+        try:
+            regex = re.compile(_translate_gitignore(line) + r"\Z")
+        except re.error:
+            continue  # Git skips patterns it cannot parse, e.g. a reversed range
+        rules.append(IgnoreRule(regex, negate, dir_only, anchored))
+    return rules
+
+class IgnoreStack:
+    """Ignore rules in effect for one directory during the walk.
+
+    Each level holds the rules of the .gitignore/.ignore files found in that
+    directory. Later and deeper rules take precedence and the last matching
+    rule decides, as in git.
+    """
+
+    def __init__(self, levels: Tuple[Tuple[str, List[IgnoreRule]], ...] = ()):
+        self.levels = levels
+
+    def push(self, dir_path: str, rel_dir: str) -> "IgnoreStack":
+        """Return the stack for a directory, adding its own ignore files.
+
+        Args:
+            dir_path: Path of the directory on disk
+            rel_dir: Directory path relative to the repository root ("" or ending in "/")
+
+        Returns:
+            The ignore stack to use for entries of this directory
+        """
+        rules: List[IgnoreRule] = []
+        for name in IGNORE_FILES:
+            try:
+                with open(os.path.join(dir_path, name), "r", encoding="utf-8", errors="replace") as f:
+                    rules.extend(parse_ignore_lines(f))
+            except OSError:
+                continue
+        if not rules:
+            return self
+        return IgnoreStack(self.levels + ((rel_dir, rules),))
+
+    def is_ignored(self, rel_path: str, name: str, is_dir: bool) -> bool:
+        """Check an entry against every level, deepest and last rule first.
+
+        Args:
+            rel_path: Entry path relative to the repository root
+            name: Entry name
+            is_dir: Whether the entry is a directory
+
+        Returns:
+            True if the entry is ignored
+        """
+        for base, rules in reversed(self.levels):
+            local_path = rel_path[len(base):]
+            for rule in reversed(rules):
+                if rule.dir_only and not is_dir:
+                    continue
+                target = local_path if rule.anchored else name
+                if rule.regex.match(target):
+                    return not rule.negate
+        return False
+
+def load_root_ignores(repo_path: str) -> IgnoreStack:
+    """Build the ignore stack for the repository root.
+
+    Includes .git/info/exclude in addition to the root ignore files.
+
+    Args:
+        repo_path: Path to the repository
+
+    Returns:
+        Ignore stack for the root directory
+    """
+    stack = IgnoreStack()
+    try:
+        with open(os.path.join(repo_path, ".git", "info", "exclude"), "r", encoding="utf-8", errors="replace") as f:
+            rules = parse_ignore_lines(f)
+        if rules:
+            stack = IgnoreStack((("", rules),))
+    except OSError:
+        pass
+    return stack.push(repo_path, "")
@@ -1,10 +1,11 @@
 import os
-import fnmatch
-from pathlib import Path
-from typing import List, Tuple
-import aiofiles
+import re
+from functools import lru_cache
+from typing import List, Pattern, Tuple
 from aiofiles.os import wrap
 
+from src.utils.repo_scanner import scan_repository
+
 # Wrap os functions for async use
 os_listdir = wrap(os.listdir)
 os_path_exists = wrap(os.path.exists)
@@ -25,36 +26,52 @@ async def get_file_tree(startpath: str, exclude_patterns: Tuple[str, ...] = None
     Returns:
         String representation of the directory tree
     """
-    if exclude_patterns is None:
-        from src.config.settings import EXCLUDE_PATTERNS
-        exclude_patterns = EXCLUDE_PATTERNS
+    index = await scan_repository(startpath, exclude_patterns)
+    return index.tree
+
+@lru_cache(maxsize=8)
+def _long_line_pattern(width: int) -> Pattern:
+    """Match whole lines longer than width."""
+    return re.compile(r'^[^\n]{%d,}' % (width + 1), re.MULTILINE)
 
-    tree_lines = []
+_NON_SPACE = re.compile(r'[^ ]')
 
-    async def tree(dir_path: str, prefix: str = "") -> None:
-        try:
-            entries = []
-            for entry in await os_listdir(dir_path):
-                if any(fnmatch.fnmatch(entry, pattern) for pattern in exclude_patterns):
-                    continue
-                entries.append(entry)
-            for idx, entry in enumerate(sorted(entries)):
-                full_path = os_path_join(dir_path, entry)
-                connector = "+-- " if idx == len(entries) - 1 else "|-- "
-                tree_lines.append(f"{prefix}{connector}{entry}")
-                if await os_path_exists(full_path) and os.path.isdir(full_path):
-                    extension = "    " if idx == len(entries) - 1 else "|   "
-                    await tree(full_path, prefix + extension)
-        except PermissionError:
-            tree_lines.append(f"{prefix}[Permission Denied]")
+def _wrap_line(line: str, width: int) -> List[str]:
+    """Greedily wrap one line at spaces; words longer than width are kept whole.
 
-    tree_lines.append(os_path_basename(os_path_abspath(startpath)) + "/")
-    await tree(startpath)
-    return "\n".join(tree_lines)
+    Each output line is cut at the last space within reach, so the work
+    is per output line rather than per word. Spaces at a break are dropped.
+    """
+    wrapped = []
+    end = len(line)
+    start = 0
+    while True:
+        if start < end and line[start] == ' ':
+            match = _NON_SPACE.search(line, start)
+            if match is None:
+                break
+            start = match.start()
+        elif start >= end:
+            break
+        if start + width >= end:
+            wrapped.append(line[start:])
+            break
+        cut = line.rfind(' ', start, start + width + 1)
+        if cut == -1:
+            cut = line.find(' ', start)
+            if cut == -1:
+                wrapped.append(line[start:])
+                break
+        wrapped.append(line[start:cut])
+        start = cut + 1
+    return wrapped
 
 def wrap_text(text: str, width: int) -> str:
     """Wrap text to a specified width.
     
+    Runs of lines that already fit are copied through unchanged; only
+    lines longer than width are wrapped.
+    
     Args:
         text: The text to wrap
         width: Maximum width of each line
@@ -62,32 +79,25 @@ def wrap_text(text: str, width: int) -> str:
     Returns:
         Wrapped text with line breaks
     """
-    lines = text.split('\n')
-    wrapped_lines = []
-    
-    for line in lines:
-        if len(line) <= width:
-            wrapped_lines.append(line)
-            continue
-            
-        current_line = ''
-        words = line.split(' ')
-        
-        for word in words:
-            if len(current_line) + len(word) + 1 <= width:
-                if current_line:
-                    current_line += ' ' + word
-                else:
-                    current_line = word
-            else:
-                if current_line:
-                    wrapped_lines.append(current_line)
-                current_line = word
-                
-        if current_line:
-            wrapped_lines.append(current_line)
-            
-    return '\n'.join(wrapped_lines)
+    pieces = []
+    pos = 0
+    for match in _long_line_pattern(width).finditer(text):
+        start, end = match.span()
+        wrapped = _wrap_line(match.group(), width)
+        if wrapped:
+            pieces.append(text[pos:start])
+            pieces.append('\n'.join(wrapped))
+            pos = end
+        elif start > pos:
+            # A line that wraps to nothing is dropped together with one line break
+            pieces.append(text[pos:start - 1])
+            pos = end
+        else:
+            pos = end + 1 if end < len(text) else end
+    if not pos:
+        return text
+    pieces.append(text[pos:])
+    return ''.join(pieces)
 
 async def get_files_to_process(repo_path: str) -> List[str]:
     """Get list of files to process from repository.
@@ -98,13 +108,5 @@ async def get_files_to_process(repo_path: str) -> List[str]:
     Returns:
         List of file paths to process
     """
-    from src.config.settings import EXCLUDE_PATTERNS
-    
-    files_to_process = []
-    for root, _, files in os.walk(repo_path):
-        for file in files:
-            file_path = os_path_join(root, file)
-            rel_path = os_path_relpath(file_path, repo_path)
-            if not any(fnmatch.fnmatch(rel_path, pattern) for pattern in EXCLUDE_PATTERNS):
-                files_to_process.append(file_path)
-    return files_to_process
+    index = await scan_repository(repo_path)
+    return index.files
@@ -0,0 +1,188 @@
+import os
+import asyncio
+import subprocess
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from aiofiles.os import wrap
+
+from src.config.settings import SNIFF_SIZE
+from src.utils.encoding import sniff_encoding
+from src.utils.exclude_matcher import ExcludeMatcher
+from src.utils.repo_scanner import RepoIndex
+
+@dataclass
+class GitBlob:
+    """A file tracked at the requested revision."""
+    rel_path: str
+    mode: str
+    oid: str
+    size: int
+
+class GitSource:
+    """Files of one commit, read straight from the object database.
+
+    Blob contents are streamed through a single long-lived
+    ``git cat-file --batch`` process instead of opening a file per path.
+    """
+
+    def __init__(self, repo_path: str, rev: str, blobs: Dict[str, GitBlob]):
+        self.repo_path = repo_path
+        self.rev = rev
+        self.blobs = blobs  # Keyed by the path the file would have in the working tree
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def blob_for(self, file_path: str) -> Optional[GitBlob]:
+        return self.blobs.get(file_path)
+
+    async def read_bytes(self, file_path: str) -> Tuple[Optional[str], bytes]:
+        """Read a blob, classifying it like a file read from disk.
+
+        Args:
+            file_path: Working-tree path of the file
+
+        Returns:
+            (encoding, raw content); encoding is None when the blob is binary
+        """
+        data = await self.read_blob(self.blobs[file_path].oid)
+        return sniff_encoding(data[:SNIFF_SIZE]), data
+
+    async def read_blob(self, oid: str) -> bytes:
+        """Read one object through the cat-file process.
+
+        Args:
+            oid: Object id of the blob
+
+        Returns:
+            The blob content
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._process is None or self._process.returncode is not None:
+                self._process = await asyncio.create_subprocess_exec(
+                    "git", "-C", self.repo_path, "cat-file", "--batch",
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL,
+                )
+            self._process.stdin.write(oid.encode("ascii") + b"\n")
+            await self._process.stdin.drain()
+            header = (await self._process.stdout.readline()).decode("ascii", "replace").split()
+            if len(header) != 3:
+                raise OSError(f"git cat-file could not read {oid}: {' '.join(header)}")
+            # Content is followed by a newline
+            return (await self._process.stdout.readexactly(int(header[2]) + 1))[:-1]
+
+    async def close(self) -> None:
+        """Stop the cat-file process."""
+        if self._process is not None and self._process.returncode is None:
+            self._process.stdin.close()
+            await self._process.wait()
+        self._process = None
+
+def list_tree(repo_path: str, rev: str) -> List[GitBlob]:
+    """List the files tracked at a revision with ``git ls-tree``.
+
+    Submodules are left out since their content is not in this repository.
+    When repo_path is a subdirectory of the repository, only its subtree is
+    listed, with paths relative to it.
+
+    Args:
+        repo_path: Path to the repository
+        rev: Commit, branch, tag or tree to read
+
+    Returns:
+        Tracked files with their blob ids and sizes
+
+    Raises:
+        ValueError: If git is missing or the revision cannot be read
+    """
+    try:
+        result = subprocess.run(
+            ["git", "-C", repo_path, "ls-tree", "-r", "-l", "-z", rev],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False,
+        )
+    except OSError as e:
+        raise ValueError(f"git is not available: {e}") from e
+    if result.returncode != 0:
+        message = result.stderr.decode("utf-8", "replace").strip()
+        raise ValueError(f"Cannot read revision '{rev}': {message}")
+
+    blobs = []
+    for record in result.stdout.split(b"\0"):
+        if not record:
+            continue
+        meta, path = record.split(b"\t", 1)
+        mode, kind, oid, size = meta.decode("ascii").split()
+        if kind != "blob":
+            continue
+        blobs.append(GitBlob(path.decode("utf-8", "surrogateescape"), mode, oid, int(size)))
+    return blobs
+
+def _render_tree(root_name: str, paths: List[str]) -> str:
+    """Render tracked paths in the same layout as the working-tree scan."""
+    tree: dict = {}
+    for path in paths:
+        node = tree
+        for part in path.split("/"):
+            node = node.setdefault(part, {})
+
+    lines = [root_name + "/"]
+
+    def walk(node: dict, prefix: str) -> None:
+        names = sorted(node)
+        for idx, name in enumerate(names):
+            is_last = idx == len(names) - 1
+            lines.append(f"{prefix}{'+-- ' if is_last else '|-- '}{name}")
+            if node[name]:
+                walk(node[name], prefix + ("    " if is_last else "|   "))
+
+    walk(tree, "")
+    return "\n".join(lines)
+
+def _load_git_source(repo_path: str, rev: str,
+                     exclude_patterns: Tuple[str, ...] = None) -> Tuple[RepoIndex, GitSource]:
+    """Index the files tracked at a revision.
+
+    Exclude patterns are applied as in the working-tree scan, so a clean
+    checkout of the same commit produces the same output; .gitignore files
+    are not needed since only tracked files are listed.
+
+    Args:
+        repo_path: Path to the repository
+        rev: Commit, branch, tag or tree to read
+        exclude_patterns: Patterns to exclude, defaults to EXCLUDE_PATTERNS
+
+    Returns:
+        Index of the files to process and the source to read them from
+    """
+    from src.config.settings import EXCLUDE_PATTERNS
+    if exclude_patterns is None:
+        exclude_patterns = EXCLUDE_PATTERNS
+    matcher = ExcludeMatcher(exclude_patterns)
+
+    listed: List[str] = []
+    # Directories the working-tree scan shows although nothing below them is listed
+    kept_dirs: Set[str] = set()
+    blobs: Dict[str, GitBlob] = {}
+    for blob in list_tree(repo_path, rev):
+        *dirs, name = blob.rel_path.split("/")
+        depth = next((i for i, part in enumerate(dirs) if matcher.excludes_dir(part)), None)
+        if depth is not None or matcher.excludes_name(name):
+            if depth is None:
+                depth = len(dirs)
+            if depth:
+                kept_dirs.add("/".join(dirs[:depth]))
+            continue
+        listed.append(blob.rel_path)
+        if not matcher.excludes_path(blob.rel_path):
+            blobs[os.path.join(repo_path, *blob.rel_path.split("/"))] = blob
+
+    tree = _render_tree(os.path.basename(os.path.abspath(repo_path)), listed + sorted(kept_dirs))
+    # Process files in tree order, as the working-tree scan does
+    order = {path: i for i, path in enumerate(sorted(listed, key=lambda p: p.split("/")))}
+    files = sorted(blobs, key=lambda path: order[blobs[path].rel_path])
+    return RepoIndex(root=repo_path, tree=tree, files=files), GitSource(repo_path, rev, blobs)
+
+load_git_source = wrap(_load_git_source)
@@ -0,0 +1,137 @@
+import os
+import gc
+import time
+from typing import Iterator, List, Optional
+
+from src.config.settings import (
+    CHUNK_SIZE, PREFETCH_MAX_BYTES, MEMORY_CEILING, MEMORY_CEILING_FRACTION, GOVERNOR_INTERVAL,
+)
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+HIGH_WATER = 0.9  # Share of the ceiling above which read-ahead is cut
+LOW_WATER = 0.7  # Share of the ceiling below which read-ahead grows back
+UNLIMITED = 1 << 60  # cgroup v1 reports "no limit" as a huge number
+
+def _read_limit(path: str) -> Optional[int]:
+    try:
+        with open(path, 'r', encoding='ascii') as f:
+            value = f.read().strip()
+    except (OSError, ValueError):
+        return None
+    if not value.isdigit() or int(value) >= UNLIMITED:
+        return None  # "max" or unlimited
+    return int(value)
+
+def _ancestors(base: str, path: str) -> Iterator[str]:
+    """Yield base/path and every parent directory up to base."""
+    parts = [part for part in path.split("/") if part]
+    for depth in range(len(parts), -1, -1):
+        yield os.path.join(base, *parts[:depth])
+
+def cgroup_memory_limits(proc_cgroup: str = "/proc/self/cgroup") -> List[int]:
+    """Memory limits of the cgroups this process belongs to.
+
+    Reads memory.max (cgroup v2) or memory.limit_in_bytes (cgroup v1) of
+    the process's cgroup and its ancestors, since any of them can cap it.
+
+    Returns:
+        Limits in bytes; empty when there are none or cgroups are unavailable
+    """
+    try:
+        with open(proc_cgroup, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+    limits = []
+    for line in lines:
+        _, controllers, path = line.split(":", 2)
+        if controllers == "":
+            candidates = (os.path.join(d, "memory.max") for d in _ancestors(CGROUP_ROOT, path))
+        elif "memory" in controllers.split(","):
+            base = os.path.join(CGROUP_ROOT, "memory")
+            candidates = (os.path.join(d, "memory.limit_in_bytes") for d in _ancestors(base, path))
+        else:
+            continue
+        limits.extend(limit for limit in map(_read_limit, candidates) if limit is not None)
+    return limits
+
+def host_memory() -> int:
+    """Physical memory of the machine in bytes."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        import psutil
+        return psutil.virtual_memory().total
+
+def memory_limit() -> int:
+    """Memory available to this process: the host's, or a tighter container limit."""
+    return min([host_memory(), *cgroup_memory_limits()])
+
+def resident_memory() -> int:
+    """Current resident memory of this process in bytes."""
+    try:
+        with open("/proc/self/statm", 'r', encoding='ascii') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss
+
+class ResourceGovernor:
+    """Adapts read-ahead to stay under a memory ceiling.
+
+    ordered_prefetch reads ``max_tasks`` and ``max_bytes`` every time it
+    refills its window and reports the bytes it holds through ``observe``.
+    Resident memory is sampled at most every ``interval`` seconds: above
+    the high-water mark garbage is collected and, if that is not enough,
+    both limits are halved, so reading and formatting wait for the writer;
+    below the low-water mark they grow back towards the configured maximums.
+    The byte budget never exceeds half of the remaining headroom.
+    """
+
+    def __init__(self, ceiling: Optional[int] = MEMORY_CEILING, max_tasks: int = 1,
+                 max_bytes: int = PREFETCH_MAX_BYTES, interval: float = GOVERNOR_INTERVAL):
+        self.ceiling = ceiling or int(memory_limit() * MEMORY_CEILING_FRACTION)
+        self.task_limit = max(1, max_tasks)
+        self.byte_limit = max(CHUNK_SIZE, max_bytes)
+        self.max_tasks = self.task_limit
+        self.max_bytes = self.byte_limit
+        self.interval = interval
+        self.bytes_in_flight = 0
+        self.peak_rss = 0
+        self.min_tasks = self.max_tasks  # Lowest concurrency used
+        self.throttled = 0  # Times the limits were cut
+        self._next_sample = 0.0
+        self.sample()
+
+    def observe(self, bytes_in_flight: int) -> None:
+        """Record the bytes held by the read-ahead window and resample if due."""
+        self.bytes_in_flight = bytes_in_flight
+        if time.monotonic() >= self._next_sample:
+            self.sample()
+
+    def sample(self) -> None:
+        """Measure resident memory and adjust the limits."""
+        self._next_sample = time.monotonic() + self.interval
+        rss = resident_memory()
+        if rss > self.ceiling * HIGH_WATER:
+            gc.collect()
+            rss = resident_memory()
+            if rss > self.ceiling * HIGH_WATER:
+                self.max_tasks = max(1, self.max_tasks // 2)
+                self.max_bytes = max(CHUNK_SIZE, self.max_bytes // 2)
+                self.throttled += 1
+        elif rss < self.ceiling * LOW_WATER:
+            self.max_tasks = min(self.task_limit, self.max_tasks + max(1, self.task_limit // 8))
+            self.max_bytes = min(self.byte_limit, self.max_bytes + self.byte_limit // 8)
+        self.max_bytes = max(CHUNK_SIZE, min(self.max_bytes, (self.ceiling - rss) // 2))
+        self.min_tasks = min(self.min_tasks, self.max_tasks)
+        self.peak_rss = max(self.peak_rss, rss)
+
+    def to_dict(self) -> dict:
+        return {
+            "ceiling": self.ceiling,
+            "peak_rss": self.peak_rss,
+            "throttled": self.throttled,
+            "min_tasks": self.min_tasks,
+            "max_tasks": self.task_limit,
+        }
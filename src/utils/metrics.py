@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Optional
+
+@dataclass
+class FileMetrics:
+    """Measurements for one file."""
+    rel_path: str
+    read_s: float = 0.0
+    format_s: float = 0.0
+    formatter: Optional[str] = None  # black, autopep8, prettier, raw, timeout, disk-cache, ...
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+    @property
+    def total_s(self) -> float:
+        return self.read_s + self.format_s
+
+class RunMetrics:
+    """Measurements for one run, collected while metrics are enabled.
+
+    Stages accumulate wall time across calls. Per-file measurements are
+    attributed through a context variable, so formatter outcomes recorded
+    deep inside code_formatter end up on the file being processed.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.files: Dict[str, FileMetrics] = {}
+        self.formatters: Counter = Counter()
+        self.cache: Dict[str, Dict[str, int]] = {}
+        self.governor: Dict[str, int] = {}  # Memory ceiling and read-ahead adjustments
+
+    def add_file(self, rel_path: str) -> FileMetrics:
+        metrics = FileMetrics(rel_path)
+        self.files[rel_path] = metrics
+        return metrics
+
+    def slowest(self, n: int) -> List[FileMetrics]:
+        """Return the n files that took longest to read and format."""
+        return sorted(self.files.values(), key=lambda f: f.total_s, reverse=True)[:n]
+
+    def to_dict(self, top_n: int = 10) -> dict:
+        """Summarize the run as JSON-serializable data.
+
+        Args:
+            top_n: Number of slowest files to include
+
+        Returns:
+            Profile with stages, formatter outcomes, cache statistics,
+            byte counts, peak memory, governor adjustments and the slowest files
+        """
+        files = self.files.values()
+        return {
+            "wall_s": round(time.perf_counter() - self.started, 6),
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "files": len(self.files),
+            "bytes_in": sum(f.bytes_in for f in files),
+            "bytes_out": sum(f.bytes_out for f in files),
+            "read_s": round(sum(f.read_s for f in files), 6),
+            "format_s": round(sum(f.format_s for f in files), 6),
+            "formatters": dict(self.formatters),
+            "cache": self.cache,
+            "peak_rss": peak_rss(),
+            "governor": self.governor,
+            "slowest_files": [
+                {**asdict(f), "read_s": round(f.read_s, 6), "format_s": round(f.format_s, 6)}
+                for f in self.slowest(top_n)
+            ],
+        }
+
+    def report(self, top_n: int = 10) -> str:
+        """Render the slowest files as a table."""
+        lines = [f"Top {top_n} slowest files:",
+                 f"  {'read':>8} {'format':>8} {'formatter':<12} {'size':>9}  path"]
+        for f in self.slowest(top_n):
+            lines.append(f"  {f.read_s:>7.3f}s {f.format_s:>7.3f}s {f.formatter or '-':<12} "
+                         f"{f.bytes_in / 1024:>7.1f}KB  {f.rel_path}")
+        return "\n".join(lines)
+
+_run: Optional[RunMetrics] = None
+_current_file: ContextVar[Optional[FileMetrics]] = ContextVar("current_file", default=None)
+
+def start_run() -> RunMetrics:
+    """Enable metrics collection for a new run."""
+    global _run
+    _run = RunMetrics()
+    return _run
+
+def end_run() -> Optional[RunMetrics]:
+    """Stop collecting and return what was collected."""
+    global _run
+    run, _run = _run, None
+    return run
+
+def current_run() -> Optional[RunMetrics]:
+    """Return the run being measured, or None when metrics are disabled."""
+    return _run
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Add the wall time of the block to a stage."""
+    if _run is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _run.stages[name] += time.perf_counter() - start
+
+@contextmanager
+def track_file(rel_path: str) -> Iterator[Optional[FileMetrics]]:
+    """Attribute measurements in the block to a file.
+
+    Must be entered inside the task processing the file so concurrent
+    files do not share attribution.
+    """
+    if _run is None:
+        yield None
+        return
+    token = _current_file.set(_run.add_file(rel_path))
+    try:
+        yield _current_file.get()
+    finally:
+        _current_file.reset(token)
+
+def record_formatter(name: str) -> None:
+    """Record which formatter produced the current file's content."""
+    if _run is None:
+        return
+    current = _current_file.get()
+    if current is not None:
+        current.formatter = name
+    _run.formatters[name] += 1
+
+def peak_rss() -> Dict[str, Optional[int]]:
+    """Peak resident memory in bytes of this process and its finished children.
+
+    Falls back to the current RSS where getrusage is not available.
+    """
+    try:
+        import resource
+    except ImportError:
+        import psutil
+        return {"self": psutil.Process(os.getpid()).memory_info().rss, "children": None}
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
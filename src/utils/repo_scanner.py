@@ -0,0 +1,90 @@
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from aiofiles.os import wrap
+
+from src.utils.exclude_matcher import ExcludeMatcher, IgnoreStack, load_root_ignores
+
+@dataclass
+class RepoIndex:
+    """Result of a single walk over a repository."""
+    root: str
+    tree: str  # Rendered directory tree
+    files: List[str] = field(default_factory=list)  # Files to process, in tree order
+    stats: Dict[str, os.stat_result] = field(default_factory=dict)  # Stat result per file in `files`
+
+    def size_of(self, file_path: str) -> int:
+        return self.stats[file_path].st_size
+
+def _scan_repository(repo_path: str, exclude_patterns: Tuple[str, ...] = None,
+                     use_gitignore: Optional[bool] = None) -> RepoIndex:
+    """Walk a repository once with os.scandir.
+
+    Excluded directories (``node_modules/``, ``build/``, ...) and entries
+    ignored by the repository's .gitignore/.ignore files are pruned before
+    the walk descends. Files whose name matches an exclude pattern are left
+    out of the tree; files whose relative path matches one are listed in the
+    tree but not processed. Symlinked directories are listed but not
+    descended into.
+
+    Args:
+        repo_path: Path to the repository
+        exclude_patterns: Patterns to exclude, defaults to EXCLUDE_PATTERNS
+        use_gitignore: Honour .gitignore/.ignore files, defaults to RESPECT_GITIGNORE
+
+    Returns:
+        Index holding the tree, the file list and per-file stat results
+    """
+    from src.config.settings import EXCLUDE_PATTERNS, RESPECT_GITIGNORE
+    if exclude_patterns is None:
+        exclude_patterns = EXCLUDE_PATTERNS
+    if use_gitignore is None:
+        use_gitignore = RESPECT_GITIGNORE
+
+    matcher = ExcludeMatcher(exclude_patterns)
+    tree_lines = [os.path.basename(os.path.abspath(repo_path)) + "/"]
+    files: List[str] = []
+    stats: Dict[str, os.stat_result] = {}
+
+    def walk(dir_path: str, rel_dir: str, prefix: str, ignores: Optional[IgnoreStack]) -> None:
+        if ignores is not None:
+            ignores = ignores.push(dir_path, rel_dir) if rel_dir else load_root_ignores(dir_path)
+        try:
+            with os.scandir(dir_path) as it:
+                entries = []
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+                    name = entry.name
+                    if matcher.excludes_dir(name) if is_dir else matcher.excludes_name(name):
+                        continue
+                    if ignores is not None and ignores.is_ignored(rel_dir + name, name, is_dir):
+                        continue
+                    entries.append((name, is_dir, entry))
+        except PermissionError:
+            tree_lines.append(f"{prefix}[Permission Denied]")
+            return
+        entries.sort(key=lambda item: item[0])
+
+        for idx, (name, is_dir, entry) in enumerate(entries):
+            is_last = idx == len(entries) - 1
+            connector = "+-- " if is_last else "|-- "
+            tree_lines.append(f"{prefix}{connector}{name}")
+            rel_path = rel_dir + name
+            if is_dir:
+                if not entry.is_symlink():
+                    extension = "    " if is_last else "|   "
+                    walk(entry.path, rel_path + "/", prefix + extension, ignores)
+            elif not matcher.excludes_path(rel_path):
+                try:
+                    stats[entry.path] = entry.stat()
+                except OSError:
+                    continue
+                files.append(entry.path)
+
+    walk(repo_path, "", "", IgnoreStack() if use_gitignore else None)
+    return RepoIndex(root=repo_path, tree="\n".join(tree_lines), files=files, stats=stats)
+
+scan_repository = wrap(_scan_repository)
@@ -0,0 +1,30 @@
+"""Stand-in for prettier_worker.js speaking the same JSON-lines protocol.
+
+Formatting upper-cases the content. A file containing CRASH makes the
+process exit and one containing HANG makes it stop answering. With
+``--once MARKER`` only the first launch comes up; later ones exit before
+reporting ready, as if Node had gone away.
+"""
+import os
+import sys
+import json
+import time
+
+def main() -> None:
+    if len(sys.argv) == 3 and sys.argv[1] == "--once":
+        if os.path.exists(sys.argv[2]):
+            return
+        open(sys.argv[2], "w").close()
+    print(json.dumps({"ready": True, "version": "stub"}), flush=True)
+    for line in sys.stdin:
+        request = json.loads(line)
+        contents = [f["content"] for f in request["files"]]
+        if any("CRASH" in content for content in contents):
+            sys.exit(1)
+        if any("HANG" in content for content in contents):
+            time.sleep(60)
+        results = [{"formatted": content.upper()} for content in contents]
+        print(json.dumps({"id": request["id"], "results": results}), flush=True)
+
+if __name__ == "__main__":
+    main()
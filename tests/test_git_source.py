@@ -0,0 +1,101 @@
+import os
+import shutil
+import asyncio
+import subprocess
+
+import pytest
+
+from src.config.settings import MAX_FILE_SIZE
+from src.processors.ingest import iter_file_contents
+from src.utils.git_source import list_tree, _load_git_source
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+def _git(repo: str, *args: str) -> None:
+    subprocess.run(["git", "-C", repo, "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def _write(repo: str, rel_path: str, data: bytes) -> None:
+    path = os.path.join(repo, *rel_path.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+@pytest.fixture
+def repo(tmp_path):
+    root = str(tmp_path / "repo")
+    os.makedirs(root)
+    _git(root, "init", "-q")
+    _write(root, "README.md", b"# Demo\n")
+    _write(root, "src/app.py", b"print('hello')\n")
+    _write(root, "src/core/util.txt", b"util\n")
+    _write(root, "web/node_modules/lib/index.js", b"module.exports = 1;\n")
+    _write(root, "big.txt", b"x" * (MAX_FILE_SIZE + 1))
+    _git(root, "add", "-A", "-f")
+    _git(root, "commit", "-q", "-m", "initial")
+    return root
+
+def test_list_tree(repo):
+    blobs = {blob.rel_path: blob for blob in list_tree(repo, "HEAD")}
+    assert set(blobs) == {"README.md", "src/app.py", "src/core/util.txt", "web/node_modules/lib/index.js", "big.txt"}
+    assert blobs["README.md"].size == len(b"# Demo\n")
+    assert blobs["src/app.py"].mode == "100644"
+
+def test_unknown_revision(repo):
+    with pytest.raises(ValueError):
+        list_tree(repo, "no-such-branch")
+
+def test_excluded_directories_keep_their_parents_in_the_tree(repo):
+    index, _ = _load_git_source(repo, "HEAD")
+    assert os.path.join(repo, "web", "node_modules", "lib", "index.js") not in index.files
+    assert "web" in index.tree and "node_modules" not in index.tree
+
+def test_streams_committed_content(repo):
+    _write(repo, "src/app.py", b"changed in the working tree\n")
+    index, source = _load_git_source(repo, "HEAD")
+
+    async def read_all():
+        try:
+            contents, processes = [], set()
+            for rel_path in ("README.md", "src/app.py"):
+                contents.append(await source.read_bytes(os.path.join(repo, *rel_path.split("/"))))
+                processes.add(source._process.pid)
+            return contents, processes
+        finally:
+            await source.close()
+
+    contents, processes = asyncio.run(read_all())
+    assert contents == [("utf-8", b"# Demo\n"), ("utf-8", b"print('hello')\n")]
+    assert len(processes) == 1  # Both blobs came through one cat-file process
+
+def test_large_blobs_are_skipped_unread(repo):
+    index, source = _load_git_source(repo, "HEAD")
+    big = os.path.join(repo, "big.txt")
+
+    async def fail(oid):
+        raise AssertionError("large blob was read")
+
+    source.read_blob = fail
+
+    async def ingest():
+        try:
+            return [ingested async for ingested in iter_file_contents(repo, [big], source=source)]
+        finally:
+            await source.close()
+
+    [ingested] = asyncio.run(ingest())
+    assert ingested.content.startswith("[File too large to process")
+
+def test_subdirectory_repo_path(repo):
+    sub = os.path.join(repo, "src")
+    index, source = _load_git_source(sub, "HEAD")
+    assert index.files == [os.path.join(sub, "app.py"), os.path.join(sub, "core", "util.txt")]
+    assert index.tree.splitlines()[0] == "src/"
+
+    async def read():
+        try:
+            return await source.read_bytes(index.files[1])
+        finally:
+            await source.close()
+
+    assert asyncio.run(read()) == ("utf-8", b"util\n")
@@ -0,0 +1,64 @@
+import os
+import sys
+import asyncio
+
+from src.formatters import prettier_pool
+from src.formatters.prettier_pool import PrettierPool
+
+STUB = os.path.join(os.path.dirname(__file__), "stub_prettier_worker.py")
+
+def _format_all(pool: PrettierPool, contents):
+    async def run():
+        try:
+            return await asyncio.gather(*(pool.format(content, ".js") for content in contents))
+        finally:
+            await pool.close()
+    return asyncio.run(run())
+
+def test_formats_through_worker():
+    pool = PrettierPool([sys.executable, STUB], size=2)
+    assert _format_all(pool, ["a", "b", "c"]) == [("A", "prettier"), ("B", "prettier"), ("C", "prettier")]
+    assert pool.version == "stub"
+
+def test_crash_only_falls_back_for_the_bad_file():
+    pool = PrettierPool([sys.executable, STUB], size=1)
+    results = _format_all(pool, ["a", "CRASH", "b", "c"])
+    assert results == [("A", "prettier"), ("CRASH", "raw"), ("B", "prettier"), ("C", "prettier")]
+
+def test_restarts_after_many_crashes():
+    pool = PrettierPool([sys.executable, STUB], size=1)
+
+    async def run():
+        try:
+            crashed = [await pool.format(f"CRASH {i}", ".js") for i in range(10)]
+            return crashed, await pool.format("f", ".js")
+        finally:
+            await pool.close()
+
+    crashed, after = asyncio.run(run())
+    assert all(used == "raw" for _, used in crashed)
+    assert after == ("F", "prettier")
+
+def test_hang_times_out_and_restarts(monkeypatch):
+    monkeypatch.setattr(prettier_pool, "PRETTIER_TIMEOUT", 1.0)
+    pool = PrettierPool([sys.executable, STUB], size=1)
+    results = _format_all(pool, ["a", "HANG", "b"])
+    assert results == [("A", "prettier"), ("HANG", "raw"), ("B", "prettier")]
+
+def test_retires_worker_that_cannot_restart(tmp_path, capsys):
+    pool = PrettierPool([sys.executable, STUB, "--once", str(tmp_path / "started")], size=1)
+    results = _format_all(pool, ["CRASH", "a", "b"])
+    assert [used for _, used in results] == ["raw", "raw", "raw"]
+    assert capsys.readouterr().out.count("Warning: prettier workers") == 1
+
+def test_worker_that_never_starts():
+    pool = PrettierPool([sys.executable, "-c", "pass"], size=2)
+    assert asyncio.run(pool.format("a", ".js")) == ("a", "raw")
+    assert not pool.available
+
+def test_falls_back_when_node_is_missing(monkeypatch):
+    monkeypatch.setattr(prettier_pool, "PRETTIER_WORKER_CMD", None)
+    monkeypatch.setattr(prettier_pool.shutil, "which", lambda name: None)
+    pool = PrettierPool()
+    assert pool.command == []
+    assert _format_all(pool, ["a"]) == [("a", "raw")]